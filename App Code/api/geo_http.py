@@ -0,0 +1,159 @@
+# api/geo_http.py
+
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
+from config import NOMINATIM_REQUESTS_PER_SECOND, ORS_REQUESTS_PER_MINUTE, GEO_HTTP_MAX_RETRIES, GEO_HTTP_POOL_SIZE
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1.0):
+        """
+        Limit the rate of calls across threads.
+        Callers reserve a token and sleep until it is theirs, so a burst is spread out
+        in arrival order instead of every caller polling at once.
+
+        Parameters:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Most tokens that can build up while idle (the burst size).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take one token, blocking until it is available.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+class BackendClient:
+    def __init__(self, name, rate, burst=1.0, max_retries=GEO_HTTP_MAX_RETRIES,
+                 backoff_base=0.5, backoff_cap=30.0, retry_on=(), pool_size=GEO_HTTP_POOL_SIZE):
+        """
+        Shared gate in front of one external service. Every call made through it is
+        rate limited by a token bucket, coalesced with identical calls already in flight,
+        and retried with jittered exponential backoff on transient errors.
+
+        Parameters:
+            name (str): The backend name, used in log messages.
+            rate (float): Requests per second allowed.
+            burst (float, optional): Requests that may be sent back to back after an idle period.
+            max_retries (int, optional): Retries after the first attempt.
+            backoff_base (float, optional): Upper bound in seconds of the first retry delay.
+            backoff_cap (float, optional): Largest retry delay in seconds.
+            retry_on (tuple of type, optional): Exception types worth retrying.
+            pool_size (int, optional): Keep-alive connections per host for sessions using http_adapter().
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_on = tuple(retry_on)
+        self.pool_size = pool_size
+        self._in_flight = {}  # key -> Future
+        self._lock = threading.Lock()
+
+    def http_adapter(self):
+        """
+        Create a pooled requests adapter to mount on the backend's session.
+        Retries are left to call(), so the adapter does not retry on its own.
+
+        Returns:
+            requests.adapters.HTTPAdapter: The adapter.
+        """
+        return HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+
+    def call(self, key, func, *args):
+        """
+        Run func(*args) against the backend. If a call with the same key is already running,
+        wait for its result instead of sending a second request.
+
+        Parameters:
+            key (hashable): Identifies the request, e.g. the normalized address.
+            func (callable): Makes the request.
+            *args: Arguments for func.
+
+        Returns:
+            The result of func.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._call_with_retry(func, args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _call_with_retry(self, func, args):
+        """
+        Call func once per token, retrying transient errors with full-jitter backoff.
+        """
+        for attempt in itertools.count():
+            self.bucket.acquire()
+            try:
+                return func(*args)
+            except self.retry_on as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                logging.warning(f"{self.name} request failed ({e}); retrying in {delay:.1f}s.")
+                time.sleep(delay)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_backend_client(name, retry_on=()):
+    """
+    Return the process-wide BackendClient for a service, creating it on first use, so every
+    geocoder or router talking to the same service shares one rate limit.
+
+    Parameters:
+        name (str): 'nominatim' or 'openrouteservice'.
+        retry_on (tuple of type, optional): Exception types worth retrying, used on creation.
+
+    Returns:
+        BackendClient: The shared client.
+    """
+    limits = {
+        # Nominatim's usage policy allows at most one request per second
+        'nominatim': (NOMINATIM_REQUESTS_PER_SECOND, 1.0),
+        'openrouteservice': (ORS_REQUESTS_PER_MINUTE / 60.0, 5.0),
+    }
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            rate, burst = limits[name]
+            client = BackendClient(name, rate, burst, retry_on=retry_on)
+            _clients[name] = client
+        return client
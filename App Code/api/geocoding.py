@@ -0,0 +1,263 @@
+# api/geocoding.py
+
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+from geopy.geocoders import Nominatim
+from geopy.adapters import RequestsAdapter
+from geopy.exc import GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited
+from api.geo_http import get_backend_client
+from utils.connection_pool import ConnectionPool
+from config import GEO_CACHE_PATH, GEOCODE_CACHE_TTL_DAYS
+
+def normalize_address(address):
+    """
+    Reduce an address to a cache key, so spelling variants of the same address share one entry.
+    Case, periods, repeated whitespace and spacing around commas are ignored.
+
+    Parameters:
+        address (str): The address as entered.
+
+    Returns:
+        str: The normalized key.
+    """
+    address = address.casefold().replace('.', ' ')
+    address = re.sub(r'\s*,\s*', ', ', address)
+    address = re.sub(r'\s+', ' ', address)
+    return address.strip(' ,')
+
+class NominatimGeocoder:
+    name = 'nominatim'
+
+    def __init__(self, user_agent="order_tracker_app", timeout=10):
+        """
+        Geocode addresses with OpenStreetMap Nominatim over the network.
+        One Nominatim instance with a keep-alive session is reused for every lookup, and
+        requests go through the shared 'nominatim' BackendClient for rate limiting,
+        coalescing and retries.
+
+        Parameters:
+            user_agent (str, optional): User agent sent to Nominatim, as its usage policy requires.
+            timeout (float, optional): Seconds to wait for a response.
+        """
+        self.http = get_backend_client(
+            self.name, retry_on=(GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited)
+        )
+        self.geolocator = Nominatim(user_agent=user_agent, timeout=timeout, adapter_factory=self.make_adapter)
+
+    def make_adapter(self, proxies, ssl_context):
+        """
+        Create geopy's requests-based adapter with a pooled session; retries are left to BackendClient.
+        """
+        return RequestsAdapter(
+            proxies=proxies,
+            ssl_context=ssl_context,
+            pool_connections=self.http.pool_size,
+            pool_maxsize=self.http.pool_size,
+            max_retries=0
+        )
+
+    def geocode(self, address):
+        """
+        Look up an address.
+
+        Parameters:
+            address (str): The address to geocode.
+
+        Returns:
+            tuple: (latitude, longitude), or None if the address was not found.
+        """
+        location = self.http.call(normalize_address(address), self.geolocator.geocode, address)
+        if location:
+            return (location.latitude, location.longitude)
+        return None
+
+class OfflineGeocoder:
+    name = 'offline'
+
+    # Approximate coordinates of the addresses the delivery simulator uses
+    DEFAULT_LOCATIONS = {
+        "3000 E Grand Blvd, Detroit, MI 48202": (42.3688, -83.0709),
+        "14601 E 12 Mile Rd, Warren, MI 48088": (42.5046, -82.9925),
+    }
+
+    def __init__(self, locations=None):
+        """
+        Stand-in geocoder that answers from a fixed table and never touches the network,
+        for tests and offline use.
+
+        Parameters:
+            locations (dict, optional): Address -> (latitude, longitude). Defaults to DEFAULT_LOCATIONS.
+        """
+        self.locations = {}
+        for address, coords in (self.DEFAULT_LOCATIONS if locations is None else locations).items():
+            self.add(address, coords)
+
+    def add(self, address, coords):
+        """
+        Add or replace a known address.
+
+        Parameters:
+            address (str): The address.
+            coords (tuple): (latitude, longitude).
+        """
+        self.locations[normalize_address(address)] = tuple(coords)
+
+    def geocode(self, address):
+        """
+        Look up an address in the table.
+
+        Parameters:
+            address (str): The address to geocode.
+
+        Returns:
+            tuple: (latitude, longitude), or None if the address is unknown.
+        """
+        return self.locations.get(normalize_address(address))
+
+GEOCODERS = {
+    NominatimGeocoder.name: NominatimGeocoder,
+    OfflineGeocoder.name: OfflineGeocoder,
+}
+
+def make_geocoder(name):
+    """
+    Create a geocoding backend by name.
+
+    Parameters:
+        name (str): A key of GEOCODERS, e.g. 'nominatim' or 'offline'.
+
+    Returns:
+        A backend with a name attribute and a geocode(address) method.
+    """
+    try:
+        return GEOCODERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown geocoder backend: {name}")
+
+class GeocodeCache:
+    def __init__(self, backend, database=GEO_CACHE_PATH, ttl=GEOCODE_CACHE_TTL_DAYS * 86400,
+                 negative_ttl=86400, error_ttl=60, max_entries=1024):
+        """
+        Cache geocoding results in memory (LRU) and in a SQLite table, in front of a backend.
+        Addresses the backend could not find are cached too, for a shorter time. Backend errors
+        (network failures, timeouts) are remembered in memory only, briefly, so a failing service
+        is not hammered but recovers on its own.
+
+        Parameters:
+            backend: The geocoder to consult on a miss, e.g. NominatimGeocoder or OfflineGeocoder.
+            database (str, optional): Path to the SQLite cache file.
+            ttl (float, optional): Seconds a found address stays cached.
+            negative_ttl (float, optional): Seconds an address that was not found stays cached.
+            error_ttl (float, optional): Seconds a backend error is remembered.
+            max_entries (int, optional): Addresses kept in the in-memory LRU.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.error_ttl = error_ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (coords or None, expires_at)
+        self._lock = threading.Lock()
+        self.pool = ConnectionPool(database)
+        conn = self.pool.get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                backend TEXT NOT NULL,
+                address_key TEXT NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (backend, address_key)
+            )
+        ''')
+        conn.commit()
+        self.purge_expired()
+
+    def geocode(self, address):
+        """
+        Return the coordinates of an address, from the cache if possible.
+
+        Parameters:
+            address (str): The address to geocode.
+
+        Returns:
+            tuple: (latitude, longitude).
+
+        Raises:
+            ValueError: If the address could not be geocoded.
+        """
+        key = normalize_address(address)
+        now = time.time()
+
+        # In-memory LRU
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                return self._result(address, entry[0])
+
+        # SQLite table
+        conn = self.pool.get_connection()
+        row = conn.execute('''
+            SELECT latitude, longitude, expires_at FROM geocode_cache
+            WHERE backend = ? AND address_key = ? AND expires_at > ?
+        ''', (self.backend.name, key, now)).fetchone()
+        if row is not None:
+            coords = (row[0], row[1]) if row[0] is not None else None
+            self._remember(key, coords, row[2])
+            return self._result(address, coords)
+
+        # Backend
+        try:
+            coords = self.backend.geocode(address)
+        except Exception as e:
+            logging.error(f"Geocoding '{address}' with {self.backend.name} failed: {e}")
+            self._remember(key, None, now + self.error_ttl)
+            raise ValueError(f"Could not geocode address: {address}") from e
+
+        expires_at = now + (self.ttl if coords is not None else self.negative_ttl)
+        with conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO geocode_cache (backend, address_key, latitude, longitude, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (self.backend.name, key, coords[0] if coords else None, coords[1] if coords else None, expires_at))
+        self._remember(key, coords, expires_at)
+        return self._result(address, coords)
+
+    def _remember(self, key, coords, expires_at):
+        """
+        Store a result in the in-memory LRU, evicting the least recently used entry if full.
+        """
+        with self._lock:
+            self._memory[key] = (coords, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _result(self, address, coords):
+        """
+        Turn a cached value into the geocode() result.
+        """
+        if coords is None:
+            raise ValueError(f"Could not geocode address: {address}")
+        return coords
+
+    def purge_expired(self):
+        """
+        Delete expired rows from the SQLite table.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        conn = self.pool.get_connection()
+        with conn:
+            return conn.execute('DELETE FROM geocode_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+
+    def close(self):
+        """
+        Close the cache's database connections.
+        """
+        self.pool.close_all()
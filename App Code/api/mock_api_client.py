@@ -1,176 +1,299 @@
 # api/mock_api_client.py
 
-import random
 import threading
 import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from models.order_status import OrderStatus
-from geopy.geocoders import Nominatim
-import openrouteservice
-from utils.email_util import send_email
-from dotenv import load_dotenv
-import os
-
-# Replace with your actual OpenRouteService API key
-ORS_API_KEY = os.getenv('ORS_API_KEY')
-
-def geocode_address(address):
-    geolocator = Nominatim(user_agent="order_tracker_app")
-    location = geolocator.geocode(address)
-    if location:
-        return (location.latitude, location.longitude)
-    else:
-        raise ValueError(f"Could not geocode address: {address}")
-
-def get_route_coordinates(start_coords, end_coords):
-    client = openrouteservice.Client(key=ORS_API_KEY)
-    try:
-        route = client.directions(
-            coordinates=[(start_coords[1], start_coords[0]), (end_coords[1], end_coords[0])],
-            profile='driving-car',
-            format='geojson'
-        )
-    except openrouteservice.exceptions.ApiError as e:
-        print(f"OpenRouteService API error: {e}")
-        return []
+from utils.scheduler import Scheduler
+from utils.event_bus import EventBus, OrderEvent, ORDER_STATUS_CHANGED, ORDER_LOCATION_CHANGED
+from api.geocoding import GeocodeCache, make_geocoder
+from api.routing import RouteCache, make_router
+from config import GEOCODER_BACKEND, ROUTER_BACKEND
+
+# Simulated delivery timeline, in seconds
+PROCESSING_DELAY = 30   # From placement until the route is planned
+PROCESSING_TIME = 30    # From route planning until the order leaves the processing center
+
+# Fractions of the delivery time at which milestones fire
+HALFWAY = 0.5
+OUT_FOR_DELIVERY = 0.75
+
+# Per-order write locks; orders hash onto one of these stripes
+LOCK_STRIPES = 64
+
+# Addresses
+SOURCE_ADDRESS = "3000 E Grand Blvd, Detroit, MI 48202"
+DESTINATION_ADDRESS = "14601 E 12 Mile Rd, Warren, MI 48088"
+
+# What a status query sees for one order. Immutable: updates build a new snapshot and swap it
+# in, so readers never lock and never see a half-applied update.
+TrackingSnapshot = namedtuple('TrackingSnapshot', [
+    'status', 'location', 'arrival_date', 'expected_arrival', 'latitude', 'longitude'
+])
 
-    geometry = route['features'][0]['geometry']
-    route_coords = geometry['coordinates']
-    # Convert coordinates from (lon, lat) to (lat, lon)
-    route_coords = [(coord[1], coord[0]) for coord in route_coords]
-    return route_coords
+class OrderTracking:
+    __slots__ = ('external_order_id', 'order', 'snapshot', 'route', 'end_coords',
+                 'departed_at', 'duration', 'timer')
+
+    def __init__(self, external_order_id, order):
+        """
+        Everything the simulated API knows about one order: its current TrackingSnapshot
+        and the state of its delivery between scheduler steps.
+
+        Parameters:
+            external_order_id (int): The order's external ID.
+            order (Order): The order being delivered.
+        """
+        self.external_order_id = external_order_id
+        self.order = order
+        self.snapshot = TrackingSnapshot(
+            status=OrderStatus.PROCESSING,
+            location='Processing Center',
+            arrival_date='TBD',
+            expected_arrival='Calculating...',
+            latitude=None,
+            longitude=None
+        )
+        self.route = None               # Shared Route once planned
+        self.end_coords = None
+        self.departed_at = None         # time.time() when the order left the processing center
+        self.duration = None            # Seconds from departure to delivery
+        self.timer = None               # Handle of the next scheduled step
 
 class MockAPIClient:
-    def __init__(self, data_store):
+    def __init__(self, data_store, io_workers=4, geocoder=None, routes=None, event_bus=None):
+        """
+        Simulated external order API.
+        Each order has one OrderTracking record. Status reads take no lock: they read the
+        record's immutable snapshot. Updates to an order hold only that order's lock stripe,
+        and never do I/O while holding it. Every status change and delivery milestone is
+        published on the event bus with source 'api'.
+
+        Parameters:
+            data_store (DataStore): The application's data store.
+            io_workers (int, optional): Threads for geocoding and routing.
+            geocoder (GeocodeCache, optional): Geocoding cache to use; by default one in front
+                of the GEOCODER_BACKEND backend.
+            routes (RouteCache, optional): Route cache to use; by default one in front of the
+                ROUTER_BACKEND backend.
+            event_bus (EventBus, optional): Where order events are published.
+        """
         self.data_store = data_store  # Reference to DataStore
-        self.external_order_statuses = {}
-        self.order_lock = threading.Lock()
-        self.order_updates = {}  # Stores location and arrival date
-        self.location_coordinates = {}  # Stores latitude and longitude
-        self.order_routes = {}  # Stores the route coordinates for each order
+        self.event_bus = event_bus or EventBus()
+        self.trackings = {}  # external_order_id -> OrderTracking
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+        # One timer thread drives every delivery; geocoding and routing run on a small pool
+        self.scheduler = Scheduler(name='delivery-scheduler')
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='delivery-io')
+        self.geocoder = geocoder or GeocodeCache(make_geocoder(GEOCODER_BACKEND))
+        self.routes = routes or RouteCache(make_router(ROUTER_BACKEND))
+
+    def lock_for(self, external_order_id):
+        """
+        The lock stripe guarding updates to one order.
+
+        Parameters:
+            external_order_id (int): The order's external ID.
+
+        Returns:
+            threading.Lock: The stripe's lock.
+        """
+        return self.locks[hash(external_order_id) % LOCK_STRIPES]
 
     def place_order(self, order):
-        # Simulate sending order data to the external API
-        external_order_id = random.randint(100000, 999999)
-        with self.order_lock:
-            self.external_order_statuses[external_order_id] = OrderStatus.PROCESSING
-            # Initialize tracking info
-            self.order_updates[external_order_id] = {
-                'location': 'Processing Center',
-                'arrival_date': 'TBD',
-                'expected_arrival': 'Calculating...'
-            }
-            # Initialize location coordinates (e.g., warehouse location)
-            self.location_coordinates[external_order_id] = {
-                'latitude': None,
-                'longitude': None
-            }
-
-        # Start a background thread to update status
-        threading.Thread(target=self.simulate_status_updates, args=(external_order_id, order), daemon=True).start()
+        """
+        Simulate sending an order to the external API and start its delivery.
+
+        Parameters:
+            order (Order): The order. If it already has an external_order_id (allocated before
+                it was saved), that ID is used; otherwise one is allocated.
+
+        Returns:
+            int: The external order ID.
+        """
+        external_order_id = order.external_order_id
+        if external_order_id is None:
+            external_order_id = self.data_store.external_order_ids.next_id()
+        tracking = OrderTracking(external_order_id, order)
+        self.trackings[external_order_id] = tracking
+
+        # Plan the route once the order has been processing for a while
+        tracking.timer = self.scheduler.call_later(PROCESSING_DELAY, self.io_pool.submit, self.plan_route, tracking)
         return external_order_id
 
-    def simulate_status_updates(self, external_order_id, order):
-        # Example status updates
-        statuses = [OrderStatus.IN_TRANSIT, OrderStatus.OUT_FOR_DELIVERY, OrderStatus.DELIVERED]
-
-        for status in statuses:
-            time.sleep(30)  # Simulate time delay
-            with self.order_lock:
-                self.external_order_statuses[external_order_id] = status
-                order.update_status(status)
-
-            # Send email notification
-            if order.user.email:
-                email_body = f"""
-                Update on your order!
-                Order ID: {order.order_id}
-                External Order ID: {external_order_id}
-
-                Current Status: {status.value}
-                """
-                send_email(order.user.email, "Order Status Update", email_body)
-
-            # Addresses
-            source_address = "3000 E Grand Blvd, Detroit, MI 48202"
-            destination_address = "14601 E 12 Mile Rd, Warren, MI 48088"
-
-            # Geocode addresses
-            try:
-                start_coords = geocode_address(source_address)
-                end_coords = geocode_address(destination_address)
-            except ValueError as ve:
-                print(ve)
-                continue  # Skip this iteration if geocoding fails
-
-            # Use OpenRouteService to get the route
-            route_coords = get_route_coordinates(start_coords, end_coords)
-            if not route_coords:
-                # Handle error if route_coords is empty
-                print("Error obtaining route coordinates.")
+    def get_simulation_lag(self):
+        """
+        Report how far behind schedule the delivery simulator is running.
+
+        Returns:
+            dict: The scheduler's stats plus the number of deliveries in flight.
+        """
+        stats = self.scheduler.stats()
+        finished = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+        stats['in_flight'] = sum(1 for tracking in list(self.trackings.values())
+                                 if tracking.snapshot.status not in finished and tracking.timer is not None)
+        return stats
+
+    def advance(self, tracking, status, only_from=None, **changes):
+        """
+        Move an order to a new status by swapping in a new snapshot, under its lock stripe,
+        then publish the change. The Order model is left alone; the application's
+        ORDER_STATUS_CHANGED subscriber picks the status up and persists it, and
+        get_order_statuses reports it to batch readers.
+
+        Parameters:
+            tracking (OrderTracking): The order's record.
+            status (OrderStatus): The new status.
+            only_from (tuple of OrderStatus, optional): Apply only if the current status is one of these.
+            **changes: Other TrackingSnapshot fields to change.
+
+        Returns:
+            bool: True if the update was applied.
+        """
+        with self.lock_for(tracking.external_order_id):
+            if only_from is not None and tracking.snapshot.status not in only_from:
+                return False
+            tracking.snapshot = snapshot = tracking.snapshot._replace(status=status, **changes)
+        self.publish(ORDER_STATUS_CHANGED, tracking, snapshot)
+        return True
+
+    def publish(self, topic, tracking, snapshot, milestone=None, coords=None):
+        """
+        Publish an order event built from a tracking snapshot.
+
+        Parameters:
+            topic (str): ORDER_STATUS_CHANGED or ORDER_LOCATION_CHANGED.
+            tracking (OrderTracking): The order's record.
+            snapshot (TrackingSnapshot): The state to report.
+            milestone (str, optional): Names a delivery milestone that is not a status change.
+            coords (tuple, optional): (latitude, longitude) to report instead of the snapshot's.
+        """
+        latitude, longitude = coords if coords is not None else (snapshot.latitude, snapshot.longitude)
+        self.event_bus.publish(topic, OrderEvent(
+            order=tracking.order,
+            external_order_id=tracking.external_order_id,
+            status=snapshot.status,
+            location=snapshot.location,
+            latitude=latitude,
+            longitude=longitude,
+            milestone=milestone,
+            source='api'
+        ))
+
+    def plan_route(self, tracking):
+        """
+        Worker pool step: geocode the addresses and fetch the route, then schedule departure.
+        """
+        if tracking.snapshot.status == OrderStatus.CANCELLED:
+            return
+
+        # Geocode addresses
+        try:
+            start_coords = self.geocoder.geocode(SOURCE_ADDRESS)
+            end_coords = self.geocoder.geocode(DESTINATION_ADDRESS)
+        except ValueError as ve:
+            print(ve)
+            # Try again later
+            tracking.timer = self.scheduler.call_later(PROCESSING_DELAY, self.io_pool.submit, self.plan_route, tracking)
+            return
+
+        # Lanes are shared, so most orders get their route from the cache
+        route_coords = self.routes.get_route(start_coords, end_coords)
+        if not route_coords:
+            # Handle error if route_coords is empty
+            print("Error obtaining route coordinates.")
+            tracking.timer = None
+            return
+
+        total_delivery_time = self.calculate_delivery_time(tracking.order)
+        expected_arrival_timestamp = time.time() + PROCESSING_TIME + total_delivery_time  # Processing time + delivery time
+
+        # Set initial location to processing center before processing time
+        with self.lock_for(tracking.external_order_id):
+            if tracking.snapshot.status == OrderStatus.CANCELLED:
                 return
+            tracking.route = route_coords
+            tracking.end_coords = end_coords
+            tracking.duration = total_delivery_time
+            tracking.snapshot = snapshot = tracking.snapshot._replace(
+                location='Processing Center',
+                expected_arrival=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(expected_arrival_timestamp)),
+                latitude=start_coords[0],
+                longitude=start_coords[1]
+            )
+        self.publish(ORDER_LOCATION_CHANGED, tracking, snapshot, milestone='route_planned')
+
+        # --- Processing Stage ---
+        tracking.timer = self.scheduler.call_later(PROCESSING_TIME, self.depart, tracking)
+
+    def depart(self, tracking):
+        """
+        Scheduler step: the order leaves the processing center.
+        """
+        # Update status to IN_TRANSIT after processing, unless cancelled in the meantime
+        tracking.departed_at = time.time()
+        if not self.advance(tracking, OrderStatus.IN_TRANSIT, only_from=(OrderStatus.PROCESSING,), location='In Transit'):
+            return
+
+        # --- Delivery Stage ---
+        # Position is interpolated from the clock when queried, so the only
+        # scheduled work is at the milestones
+        tracking.timer = self.scheduler.call_later(HALFWAY * tracking.duration, self.halfway, tracking)
+
+    def halfway(self, tracking):
+        """
+        Scheduler step: the order is halfway along its route.
+        """
+        self.publish(ORDER_LOCATION_CHANGED, tracking, tracking.snapshot, milestone='halfway',
+                     coords=tracking.route.position_at(HALFWAY))
+        tracking.timer = self.scheduler.call_later(self.milestone_delay(tracking, OUT_FOR_DELIVERY), self.out_for_delivery, tracking)
+
+    def out_for_delivery(self, tracking):
+        """
+        Scheduler step: the order is on the last stretch of its route.
+        """
+        latitude, longitude = tracking.route.position_at(OUT_FOR_DELIVERY)
+        self.advance(tracking, OrderStatus.OUT_FOR_DELIVERY, location='Out for Delivery', latitude=latitude, longitude=longitude)
+        tracking.timer = self.scheduler.call_later(self.milestone_delay(tracking, 1.0), self.deliver, tracking)
+
+    def milestone_delay(self, tracking, fraction):
+        """
+        Seconds from now until a given fraction of the delivery time has passed.
+        """
+        return max(0.0, tracking.departed_at + fraction * tracking.duration - time.time())
+
+    def current_position(self, tracking, now=None):
+        """
+        Interpolate where an order in transit is at a given time, from its departure time and
+        the route's cumulative distance index.
 
-            # Store route for later use
-            self.order_routes[external_order_id] = route_coords
-
-            # Set initial location to processing center before processing time
-            total_delivery_time = self.calculate_delivery_time(order)
-            expected_arrival_timestamp = time.time() + 30 + total_delivery_time  # Processing time + delivery time
-            with self.order_lock:
-                self.location_coordinates[external_order_id]['latitude'] = start_coords[0]
-                self.location_coordinates[external_order_id]['longitude'] = start_coords[1]
-                self.external_order_statuses[external_order_id] = OrderStatus.PROCESSING
-                self.order_updates[external_order_id]['location'] = 'Processing Center'
-                self.order_updates[external_order_id]['expected_arrival'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(expected_arrival_timestamp))
-
-            # --- Processing Stage ---
-            processing_time = 30  # 30 seconds
-            time.sleep(processing_time)
-
-            # Update status to IN_TRANSIT after processing
-            with self.order_lock:
-                self.external_order_statuses[external_order_id] = OrderStatus.IN_TRANSIT
-                self.order_updates[external_order_id]['location'] = 'In Transit'
-
-            # --- Delivery Stage ---
-            # Simulate movement along the route
-            total_steps = len(route_coords)
-            duration_in_seconds = total_delivery_time
-            interval = duration_in_seconds / total_steps
-
-            halfway_email_sent = False
-
-            for idx, (latitude, longitude) in enumerate(route_coords):
-                time.sleep(interval)  # Wait for the interval
-                with self.order_lock:
-                    self.location_coordinates[external_order_id]['latitude'] = latitude
-                    self.location_coordinates[external_order_id]['longitude'] = longitude
-
-                    # Update status based on progress
-                    progress = idx / total_steps
-                    if progress < 0.75:
-                        self.external_order_statuses[external_order_id] = OrderStatus.IN_TRANSIT
-                        self.order_updates[external_order_id]['location'] = 'In Transit'
-                    else:
-                        self.external_order_statuses[external_order_id] = OrderStatus.OUT_FOR_DELIVERY
-                        self.order_updates[external_order_id]['location'] = 'Out for Delivery'
-
-                # Send email when halfway
-                if not halfway_email_sent and progress >= 0.5:
-                    if order.user.email:
-                        send_email(order.user.email, f"Order {external_order_id} Update", f"Your order {external_order_id} is halfway to the destination.")
-                    halfway_email_sent = True
-
-            # Final status update
-            with self.order_lock:
-                self.external_order_statuses[external_order_id] = OrderStatus.DELIVERED
-                self.order_updates[external_order_id]['location'] = 'Delivered'
-                self.order_updates[external_order_id]['arrival_date'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-                self.location_coordinates[external_order_id]['latitude'] = end_coords[0]
-                self.location_coordinates[external_order_id]['longitude'] = end_coords[1]
-
-            # Send email notification for delivery
-            if order.user.email:
-                send_email(order.user.email, f"Order {external_order_id} Delivered", f"Your order {external_order_id} has been delivered.")
+        Parameters:
+            tracking (OrderTracking): An order that has departed.
+            now (float, optional): The time.time() to evaluate at; defaults to the current time.
+
+        Returns:
+            tuple: (fraction of the delivery completed, (latitude, longitude)).
+        """
+        if now is None:
+            now = time.time()
+        fraction = min(max((now - tracking.departed_at) / tracking.duration, 0.0), 1.0)
+        return fraction, tracking.route.position_at(fraction)
+
+    def deliver(self, tracking):
+        """
+        Scheduler step: the order reaches its destination.
+        """
+        # Final status update
+        self.advance(
+            tracking, OrderStatus.DELIVERED,
+            location='Delivered',
+            arrival_date=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
+            latitude=tracking.end_coords[0],
+            longitude=tracking.end_coords[1]
+        )
+        tracking.timer = None
 
     def calculate_delivery_time(self, order):
         # Base time in seconds (10 minutes)
@@ -180,7 +303,7 @@ class MockAPIClient:
         # Total number of items
         total_items = sum(item.quantity for item in order.items)
         # Total cost of items
-        total_cost = sum(item.product.price * item.quantity for item in order.items)
+        total_cost = sum(item.unit_price * item.quantity for item in order.items)
         # Calculate additional time based on total items and total cost
         item_weight = 0.5
         cost_weight = 0.5
@@ -196,39 +319,91 @@ class MockAPIClient:
         return total_delivery_time
 
     def get_order_status(self, external_order_id):
-        with self.order_lock:
-            status = self.external_order_statuses.get(external_order_id, None)
-            tracking_info = self.order_updates.get(external_order_id, {
-                'location': 'Unknown',
-                'arrival_date': 'Unknown',
-                'expected_arrival': 'Unknown'
-            })
-            coordinates = self.location_coordinates.get(external_order_id, {
-                'latitude': None,
-                'longitude': None
-            })
-        return status, tracking_info['location'], tracking_info['arrival_date'], coordinates, tracking_info.get('expected_arrival', 'Unknown')
+        tracking = self.trackings.get(external_order_id)
+        if tracking is None:
+            return self.status_result(None, None)
+        return self.status_result(tracking, tracking.snapshot)
+
+    def get_order_statuses(self, external_order_ids):
+        """
+        Query many orders in one call.
+        All snapshots are taken while every lock stripe is held, so no update is half
+        visible across the batch, and positions are interpolated at a single instant.
+
+        Parameters:
+            external_order_ids (iterable of int): The orders to query.
+
+        Returns:
+            dict: external_order_id -> the same tuple get_order_status returns.
+        """
+        trackings = [(external_order_id, self.trackings.get(external_order_id)) for external_order_id in external_order_ids]
+        for lock in self.locks:
+            lock.acquire()
+        try:
+            snapshots = [(external_order_id, tracking, tracking.snapshot if tracking else None)
+                         for external_order_id, tracking in trackings]
+            now = time.time()
+        finally:
+            for lock in self.locks:
+                lock.release()
+        return {
+            external_order_id: self.status_result(tracking, snapshot, now)
+            for external_order_id, tracking, snapshot in snapshots
+        }
+
+    def status_result(self, tracking, snapshot, now=None):
+        """
+        Build the get_order_status tuple from a tracking snapshot.
+
+        Parameters:
+            tracking (OrderTracking): The order's record, or None if unknown.
+            snapshot (TrackingSnapshot): The snapshot to report, or None if unknown.
+            now (float, optional): The time.time() to interpolate the position at.
+
+        Returns:
+            tuple: (status, location, arrival_date, coordinates, expected_arrival).
+        """
+        if snapshot is None:
+            return None, 'Unknown', 'Unknown', {'latitude': None, 'longitude': None}, 'Unknown'
+        status = snapshot.status
+        location = snapshot.location
+        coordinates = {'latitude': snapshot.latitude, 'longitude': snapshot.longitude}
+
+        # Orders on the road are placed along their route by the clock
+        if status in (OrderStatus.IN_TRANSIT, OrderStatus.OUT_FOR_DELIVERY):
+            fraction, (latitude, longitude) = self.current_position(tracking, now)
+            coordinates = {'latitude': latitude, 'longitude': longitude}
+            if fraction >= OUT_FOR_DELIVERY:
+                status = OrderStatus.OUT_FOR_DELIVERY
+                location = 'Out for Delivery'
+        return status, location, snapshot.arrival_date, coordinates, snapshot.expected_arrival
 
     def get_order_route(self, external_order_id):
-        with self.order_lock:
-            return self.order_routes.get(external_order_id, None)
+        tracking = self.trackings.get(external_order_id)
+        return tracking.route if tracking is not None else None
 
     def cancel_order(self, external_order_id):
-        with self.order_lock:
-            status = self.external_order_statuses.get(external_order_id)
-            if status == OrderStatus.PROCESSING:
-                self.external_order_statuses[external_order_id] = OrderStatus.CANCELLED
-                # Optionally, send an email notification about the cancellation
-                order = self.get_order_by_external_id(external_order_id)
-                if order and order.user.email:
-                    email_body = f"""
-                    Your order {external_order_id} has been cancelled successfully.
-                    """
-                    send_email(order.user.email, "Order Cancellation", email_body)
-                return True
-            else:
+        # The cancellation itself is announced by whoever asked for it (AppController)
+        tracking = self.trackings.get(external_order_id)
+        if tracking is None:
+            return False
+        with self.lock_for(external_order_id):
+            if tracking.snapshot.status != OrderStatus.PROCESSING:
                 return False
+            tracking.snapshot = tracking.snapshot._replace(status=OrderStatus.CANCELLED)
+        self.scheduler.cancel(tracking.timer)
+        tracking.timer = None
+        return True
 
     def get_order_by_external_id(self, external_order_id):
         # Retrieve the order from DataStore using external_order_id
         return self.data_store.get_order_by_external_id(external_order_id)
+
+    def shutdown(self):
+        """
+        Stop the delivery scheduler and worker pool when the application exits.
+        """
+        self.scheduler.stop()
+        self.io_pool.shutdown(wait=False)
+        self.geocoder.close()
+        self.routes.close()
@@ -0,0 +1,375 @@
+# api/routing.py
+
+import os
+import threading
+import time
+import logging
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+import requests
+import openrouteservice
+from dotenv import load_dotenv
+from utils.connection_pool import ConnectionPool
+from utils.polyline import encode_polyline, decode_polyline
+from utils.geometry import simplify_route, haversine_m
+from api.geo_http import get_backend_client
+from config import GEO_CACHE_PATH, ROUTE_CACHE_TTL_DAYS, ROUTE_SIMPLIFY_TOLERANCE_M
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Replace with your actual OpenRouteService API key
+ORS_API_KEY = os.getenv('ORS_API_KEY')
+
+class Route:
+    __slots__ = ('coords', 'distances')
+
+    def __init__(self, coords):
+        """
+        An immutable route held as one flat array of doubles (lat0, lon0, lat1, lon1, ...).
+        A Route is shared by every order on the same lane, so it is never modified after creation.
+        The cumulative distance to each point is indexed once, so a position along the route
+        can be found with a binary search.
+
+        Parameters:
+            coords (array.array): Interleaved latitudes and longitudes, typecode 'd'.
+        """
+        self.coords = coords
+        self.distances = array('d')  # Metres from the start to each point
+        previous = None
+        for point in self:
+            self.distances.append(self.distances[-1] + haversine_m(previous, point) if previous else 0.0)
+            previous = point
+
+    @property
+    def total_distance(self):
+        """
+        Length of the route in metres.
+
+        Returns:
+            float: The distance from the first to the last point.
+        """
+        return self.distances[-1] if self.distances else 0.0
+
+    def position_at(self, fraction):
+        """
+        Interpolate the point a given fraction of the way along the route, by distance.
+
+        Parameters:
+            fraction (float): 0 for the start, 1 for the end; clamped to that range.
+
+        Returns:
+            tuple: (latitude, longitude).
+        """
+        fraction = min(max(fraction, 0.0), 1.0)
+        target = fraction * self.total_distance
+        index = bisect_right(self.distances, target) - 1
+        if index >= len(self) - 1:
+            return self[len(self) - 1]
+        start = self.distances[index]
+        span = self.distances[index + 1] - start
+        t = (target - start) / span if span > 0 else 0.0
+        lat0, lon0 = self[index]
+        lat1, lon1 = self[index + 1]
+        return (lat0 + (lat1 - lat0) * t, lon0 + (lon1 - lon0) * t)
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Build a route from (lat, lon) pairs.
+
+        Parameters:
+            points (iterable of tuple): (latitude, longitude) pairs.
+
+        Returns:
+            Route: The route.
+        """
+        coords = array('d')
+        for latitude, longitude in points:
+            coords.append(latitude)
+            coords.append(longitude)
+        return cls(coords)
+
+    @classmethod
+    def decode(cls, encoded):
+        """
+        Build a route from an encoded polyline.
+
+        Parameters:
+            encoded (str): The encoded polyline.
+
+        Returns:
+            Route: The route.
+        """
+        return cls.from_points(decode_polyline(encoded))
+
+    def encode(self):
+        """
+        Encode the route as a polyline for storage.
+
+        Returns:
+            str: The encoded polyline.
+        """
+        return encode_polyline(self)
+
+    def __len__(self):
+        return len(self.coords) // 2
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("route index out of range")
+        return (self.coords[2 * index], self.coords[2 * index + 1])
+
+    def __iter__(self):
+        coords = self.coords
+        for i in range(0, len(coords), 2):
+            yield (coords[i], coords[i + 1])
+
+class OpenRouteServiceRouter:
+    name = 'openrouteservice'
+
+    def __init__(self, api_key=ORS_API_KEY):
+        """
+        Fetch driving routes from OpenRouteService over the network.
+        One client with a pooled keep-alive session is reused for every request, and requests
+        go through the shared 'openrouteservice' BackendClient for rate limiting, coalescing
+        and retries.
+
+        Parameters:
+            api_key (str, optional): The OpenRouteService API key.
+        """
+        self.http = get_backend_client(self.name, retry_on=(
+            openrouteservice.exceptions.Timeout,
+            openrouteservice.exceptions._OverQueryLimit,
+            requests.exceptions.ConnectionError,
+        ))
+        self.api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """
+        The OpenRouteService client, created on first use so a missing API key only
+        fails the route requests rather than application startup.
+
+        Returns:
+            openrouteservice.Client: The shared client.
+        """
+        with self._client_lock:
+            if self._client is None:
+                # Quota errors are retried by BackendClient under the shared rate limit instead
+                client = openrouteservice.Client(key=self.api_key, retry_timeout=10, retry_over_query_limit=False)
+                # The client has no session parameter, so mount the pooled adapter on its own session
+                client._session.mount('https://', self.http.http_adapter())
+                self._client = client
+            return self._client
+
+    def route(self, start_coords, end_coords, profile='driving-car'):
+        """
+        Request a route between two points.
+
+        Parameters:
+            start_coords (tuple): (latitude, longitude) of the start.
+            end_coords (tuple): (latitude, longitude) of the destination.
+            profile (str, optional): The OpenRouteService routing profile.
+
+        Returns:
+            list of tuple: (latitude, longitude) points, or an empty list on an API error.
+        """
+        try:
+            route = self.http.call(route_key(start_coords, end_coords, profile), lambda: self.client.directions(
+                coordinates=[(start_coords[1], start_coords[0]), (end_coords[1], end_coords[0])],
+                profile=profile,
+                format='geojson'
+            ))
+        except (openrouteservice.exceptions.ApiError, openrouteservice.exceptions.Timeout,
+                requests.exceptions.ConnectionError, ValueError) as e:
+            print(f"OpenRouteService API error: {e}")
+            return []
+
+        geometry = route['features'][0]['geometry']
+        # Convert coordinates from (lon, lat) to (lat, lon)
+        return [(coord[1], coord[0]) for coord in geometry['coordinates']]
+
+class StraightLineRouter:
+    name = 'offline'
+
+    def __init__(self, points=200):
+        """
+        Stand-in router that returns a straight line between the two points without
+        touching the network, for tests and offline use.
+
+        Parameters:
+            points (int, optional): Number of points in each route.
+        """
+        self.points = points
+
+    def route(self, start_coords, end_coords, profile='driving-car'):
+        """
+        Return evenly spaced points from start to end.
+
+        Parameters:
+            start_coords (tuple): (latitude, longitude) of the start.
+            end_coords (tuple): (latitude, longitude) of the destination.
+            profile (str, optional): Ignored.
+
+        Returns:
+            list of tuple: (latitude, longitude) points.
+        """
+        steps = max(self.points - 1, 1)
+        return [
+            (start_coords[0] + (end_coords[0] - start_coords[0]) * i / steps,
+             start_coords[1] + (end_coords[1] - start_coords[1]) * i / steps)
+            for i in range(steps + 1)
+        ]
+
+ROUTERS = {
+    OpenRouteServiceRouter.name: OpenRouteServiceRouter,
+    StraightLineRouter.name: StraightLineRouter,
+}
+
+def make_router(name):
+    """
+    Create a routing backend by name.
+
+    Parameters:
+        name (str): A key of ROUTERS, e.g. 'openrouteservice' or 'offline'.
+
+    Returns:
+        A backend with a name attribute and a route(start_coords, end_coords, profile) method.
+    """
+    try:
+        return ROUTERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown router backend: {name}")
+
+def route_key(start_coords, end_coords, profile):
+    """
+    Build the cache key for a lane. Coordinates are rounded to about a metre so
+    repeated geocodes of the same address share one entry.
+
+    Parameters:
+        start_coords (tuple): (latitude, longitude) of the start.
+        end_coords (tuple): (latitude, longitude) of the destination.
+        profile (str): The routing profile.
+
+    Returns:
+        str: The key.
+    """
+    return (f"{start_coords[0]:.5f},{start_coords[1]:.5f};"
+            f"{end_coords[0]:.5f},{end_coords[1]:.5f};{profile}")
+
+class RouteCache:
+    def __init__(self, router, database=GEO_CACHE_PATH, ttl=ROUTE_CACHE_TTL_DAYS * 86400, max_entries=256,
+                 tolerance_m=ROUTE_SIMPLIFY_TOLERANCE_M):
+        """
+        Cache routes by (start, end, profile) in memory and in a SQLite table, in front of a router.
+        Each lane is held once in memory as a shared Route and stored on disk as an encoded polyline,
+        so orders on the same lane reference one copy. Routes are simplified with Douglas-Peucker
+        as they enter the cache, which cuts simulation steps and map size without a visible change.
+
+        Parameters:
+            router: The backend to consult on a miss, e.g. OpenRouteServiceRouter or StraightLineRouter.
+            database (str, optional): Path to the SQLite cache file.
+            ttl (float, optional): Seconds a route stays cached.
+            max_entries (int, optional): Routes kept in the in-memory LRU.
+            tolerance_m (float, optional): Simplification tolerance in metres; 0 keeps every point.
+        """
+        self.router = router
+        self.tolerance_m = tolerance_m
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (Route, expires_at)
+        self._lock = threading.Lock()
+        self.pool = ConnectionPool(database)
+        conn = self.pool.get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS route_cache (
+                backend TEXT NOT NULL,
+                route_key TEXT NOT NULL,
+                polyline TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (backend, route_key)
+            )
+        ''')
+        conn.execute('DELETE FROM route_cache WHERE expires_at <= ?', (time.time(),))
+        conn.commit()
+
+    def get_route(self, start_coords, end_coords, profile='driving-car'):
+        """
+        Return the route between two points, from the cache if possible.
+
+        Parameters:
+            start_coords (tuple): (latitude, longitude) of the start.
+            end_coords (tuple): (latitude, longitude) of the destination.
+            profile (str, optional): The routing profile.
+
+        Returns:
+            Route: The shared route, or None if no route could be obtained.
+        """
+        # Routes simplified with another tolerance are stored under another key
+        key = f"{route_key(start_coords, end_coords, profile)};{self.tolerance_m:g}m"
+        now = time.time()
+
+        # In-memory LRU
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                return entry[0]
+
+        # SQLite table
+        conn = self.pool.get_connection()
+        row = conn.execute('''
+            SELECT polyline, expires_at FROM route_cache
+            WHERE backend = ? AND route_key = ? AND expires_at > ?
+        ''', (self.router.name, key, now)).fetchone()
+        if row is not None:
+            return self._remember(key, Route.decode(row[0]), row[1])
+
+        # Router
+        try:
+            points = self.router.route(start_coords, end_coords, profile)
+        except Exception as e:
+            logging.error(f"Routing with {self.router.name} failed: {e}")
+            return None
+        if not points:
+            return None
+
+        # Store what was decoded from the polyline, so memory and disk hold the same points
+        encoded = encode_polyline(simplify_route(points, self.tolerance_m))
+        expires_at = now + self.ttl
+        with conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO route_cache (backend, route_key, polyline, expires_at)
+                VALUES (?, ?, ?, ?)
+            ''', (self.router.name, key, encoded, expires_at))
+        return self._remember(key, Route.decode(encoded), expires_at)
+
+    def _remember(self, key, route, expires_at):
+        """
+        Store a route in the in-memory LRU, unless another thread got there first.
+
+        Returns:
+            Route: The route now cached for the key, so concurrent callers share one instance.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > time.time():
+                route = entry[0]
+            else:
+                self._memory[key] = (route, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+        return route
+
+    def close(self):
+        """
+        Close the cache's database connections.
+        """
+        self.pool.close_all()
@@ -34,9 +34,13 @@ def main():
     def on_quit(icon, item):
         """
         Callback to handle quitting from the system tray menu.
-        Closes database connection and destroys the main window.
+        Stops the delivery simulator, flushes pending writes, closes database connection
+        and destroys the main window.
         """
         icon.stop()
+        app.api_client.shutdown()
+        app.email_notifier.shutdown()
+        app.data_store.flush()
         app.data_store.close_connection()
         root.destroy()
 
@@ -0,0 +1,144 @@
+# benchmarks/memory_benchmark.py
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.product import Product
+from models.order_item import OrderItem
+from models.order import Order
+from models.order_status import OrderStatus
+from models.user import User
+
+class LegacyProduct:
+    """Dict-based Product, as the model was before __slots__."""
+    def __init__(self, product_id, name, price, inventory=0):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+        self.inventory = inventory
+
+class LegacyOrderItem:
+    """Dict-based OrderItem, as the model was before __slots__."""
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+
+class LegacyOrder:
+    """Dict-based Order with eagerly built items, as the model was before __slots__."""
+    def __init__(self, user, items):
+        self.user = user
+        self.items = items
+        self.order_id = random.randint(1000, 9999)
+        self.status = OrderStatus.PROCESSING
+        self.external_order_id = None
+
+class LegacyUser:
+    """Dict-based User, as the model was before __slots__."""
+    def __init__(self, username, email=None):
+        self.username = username
+        self.email = email
+        self.order_history = []
+
+def order_lines(order_count, product_count, seed=1):
+    """
+    Generate deterministic (order_id, [(product_id, quantity), ...]) rows.
+
+    Parameters:
+        order_count (int): Number of orders to generate.
+        product_count (int): Number of distinct products to reference.
+        seed (int): Random seed, so every scenario loads the same data.
+
+    Yields:
+        tuple: An order_id and its list of (product_id, quantity) lines.
+    """
+    rng = random.Random(seed)
+    for order_id in range(1, order_count + 1):
+        yield order_id, [(rng.randint(1, product_count), rng.randint(1, 5)) for _ in range(rng.randint(1, 3))]
+
+def measure(label, build, order_count):
+    """
+    Run a build function under tracemalloc and print the bytes retained per order.
+
+    Parameters:
+        label (str): Name of the scenario.
+        build (callable): Builds and returns the loaded data structure.
+        order_count (int): Number of orders built, for the per-order figure.
+
+    Returns:
+        float: Bytes retained per order.
+    """
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_order = current / order_count
+    print(f"{label:<40} {current / 1024 / 1024:10.1f} MiB  {per_order:8.1f} bytes/order")
+    del data
+    return per_order
+
+def build_legacy(order_count, product_count):
+    """
+    Load orders the way the original DataStore did: dict-based objects, items built eagerly.
+    """
+    user = LegacyUser("benchmark", "benchmark@example.com")
+    products = {i: LegacyProduct(i, f"Part {i}", 9.99, 100) for i in range(1, product_count + 1)}
+    for order_id, lines in order_lines(order_count, product_count):
+        order = LegacyOrder(user, [LegacyOrderItem(products[pid], qty) for pid, qty in lines])
+        order.order_id = order_id
+        order.external_order_id = 100000 + order_id
+        order.status = OrderStatus.DELIVERED
+        user.order_history.append(order)
+    return user, products
+
+def build_slotted(order_count, product_count, hydrate):
+    """
+    Load orders the way DataStore does now: slotted objects, shared Product flyweights,
+    and a single shared items loader.
+
+    Parameters:
+        hydrate (bool): Whether to access .items on every order, as an order history refresh does.
+    """
+    user = User("benchmark", "benchmark@example.com")
+    products = {i: Product(i, f"Part {i}", 9.99, 100) for i in range(1, product_count + 1)}
+    lines_by_order = dict(order_lines(order_count, product_count)) if hydrate else {}
+    loader = lambda order_id: [OrderItem(products[pid], qty) for pid, qty in lines_by_order[order_id]]
+    for order_id in range(1, order_count + 1):
+        order = Order(user, items_loader=loader)
+        order.order_id = order_id
+        order.external_order_id = 100000 + order_id
+        order.status = OrderStatus.DELIVERED
+        user.order_history.append(order)
+    if hydrate:
+        for order in user.order_history:
+            order.items
+        lines_by_order.clear()
+    return user, products
+
+def main():
+    """
+    Compare the resident size of loaded orders before and after the __slots__ models.
+
+    Usage:
+        python benchmarks/memory_benchmark.py --orders 1000000
+    """
+    parser = argparse.ArgumentParser(description="Measure bytes per loaded order for the model classes.")
+    parser.add_argument('--orders', type=int, default=1_000_000, help="Number of orders to load.")
+    parser.add_argument('--products', type=int, default=15, help="Number of distinct products.")
+    args = parser.parse_args()
+
+    print(f"Loading {args.orders} orders over {args.products} products")
+    before = measure("before: dict classes, eager items", lambda: build_legacy(args.orders, args.products), args.orders)
+    lazy = measure("after: slots, items not yet loaded", lambda: build_slotted(args.orders, args.products, False), args.orders)
+    hydrated = measure("after: slots, items loaded", lambda: build_slotted(args.orders, args.products, True), args.orders)
+    print(f"Reduction: {1 - hydrated / before:.0%} with items loaded, {1 - lazy / before:.0%} before first access")
+
+if __name__ == '__main__':
+    main()
@@ -2,3 +2,34 @@
 
 # Define the admin password here
 ADMIN_PASSWORD = "admin123"
+
+# Path to the SQLite database file
+DATABASE_PATH = "data_store.db"
+
+# Batch order status and inventory writes instead of committing each one. Off by default:
+# when enabled, updates the UI has already shown can be lost if the app crashes before the
+# next flush (at most WRITE_BEHIND_FLUSH_INTERVAL seconds or WRITE_BEHIND_BATCH_SIZE writes)
+WRITE_BEHIND_ENABLED = False
+WRITE_BEHIND_FLUSH_INTERVAL = 1.0  # seconds
+WRITE_BEHIND_BATCH_SIZE = 200
+
+# How often the UI checks the database for changes made by other instances
+DATABASE_REFRESH_INTERVAL_MS = 5000
+
+# Delivered and cancelled orders older than this move to the archive database
+ARCHIVE_DATABASE_PATH = "data_store_archive.db"
+ARCHIVE_AFTER_DAYS = 90
+
+# Geocoding and routing results are cached here; 'offline' answers from a fixed table without network access
+GEO_CACHE_PATH = "geo_cache.db"
+GEOCODE_CACHE_TTL_DAYS = 30
+GEOCODER_BACKEND = "nominatim"
+ROUTE_CACHE_TTL_DAYS = 30
+ROUTER_BACKEND = "openrouteservice"
+ROUTE_SIMPLIFY_TOLERANCE_M = 5.0  # Route points closer than this to the simplified line are dropped
+
+# Request limits and retries for the external geocoding and routing services
+NOMINATIM_REQUESTS_PER_SECOND = 1.0
+ORS_REQUESTS_PER_MINUTE = 40
+GEO_HTTP_MAX_RETRIES = 4
+GEO_HTTP_POOL_SIZE = 10
@@ -4,12 +4,17 @@ from api.mock_api_client import MockAPIClient
 from models.data_store import DataStore
 from models.user import User
 from models.order_status import OrderStatus
+from utils.event_bus import EventBus, OrderEvent, ORDER_STATUS_CHANGED
+from utils.email_notifier import EmailNotifier
+from config import WRITE_BEHIND_ENABLED, WRITE_BEHIND_FLUSH_INTERVAL, WRITE_BEHIND_BATCH_SIZE, ARCHIVE_AFTER_DAYS
 
 class AppController:
     def __init__(self, root):
         """
         Initialize the application controller.
-        This sets up a User, DataStore, and MockAPIClient instances.
+        This sets up a User, the event bus, and the DataStore, MockAPIClient and
+        EmailNotifier instances. Status changes published by the simulator or by
+        user actions are persisted by a subscriber, and views subscribe to the same bus.
         
         Parameters:
             root: The root Tkinter window or main application context.
@@ -17,11 +22,42 @@ class AppController:
         # Initialize User with username and email
         self.user = User(username="ejgerg1", email="ejgerg1@gmail.com")
 
+        # Order status and location changes are published here
+        self.event_bus = EventBus()
+
         # Initialize DataStore with the User instance (handles database and data management)
-        self.data_store = DataStore(self.user)
+        self.data_store = DataStore(
+            self.user,
+            write_behind=WRITE_BEHIND_ENABLED,
+            flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+            flush_batch_size=WRITE_BEHIND_BATCH_SIZE,
+            archive_after_days=ARCHIVE_AFTER_DAYS,
+            event_bus=self.event_bus
+        )
 
         # Initialize MockAPIClient with the DataStore instance (handles simulated external API calls)
-        self.api_client = MockAPIClient(self.data_store)
+        self.api_client = MockAPIClient(self.data_store, event_bus=self.event_bus)
+
+        # Customers are emailed about their orders as events arrive
+        self.email_notifier = EmailNotifier(self.event_bus)
+
+        # Persist status changes from the simulator and user actions
+        self.event_bus.subscribe(ORDER_STATUS_CHANGED, self.persist_order_status)
+
+    def persist_order_status(self, event):
+        """
+        Event subscriber that writes a published status change to the data store.
+        Runs on the publisher's thread; with write-behind enabled the write is only queued.
+        The data store republishes the change with source 'data_store', which is ignored here.
+        
+        Parameters:
+            event (OrderEvent): The published event.
+        """
+        if event.source == 'data_store':
+            return
+        order = self.data_store.get_order_by_external_id(event.external_order_id) or event.order
+        if order is not None:
+            self.data_store.update_order_statuses([(order, event.status)], flush=False)
 
     def get_order_by_external_id(self, external_order_id):
         """
@@ -47,6 +83,11 @@ class AppController:
         """
         success = self.api_client.cancel_order(order.external_order_id)
         if success:
-            order.status = OrderStatus.CANCELLED
-            self.data_store.update_order_status(order)
+            # Persistence and the cancellation email are handled by subscribers
+            self.event_bus.publish(ORDER_STATUS_CHANGED, OrderEvent(
+                order=order,
+                external_order_id=order.external_order_id,
+                status=OrderStatus.CANCELLED,
+                source='controller'
+            ))
         return success
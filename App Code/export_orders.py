@@ -0,0 +1,40 @@
+# export_orders.py
+
+import argparse
+import logging
+from models.data_store import DataStore
+from models.user import User
+
+def main():
+    """
+    Headless entry point for exporting order history to CSV or JSONL.
+
+    Usage:
+        python export_orders.py orders.csv --user ejgerg1 --status Delivered --start 2024-01-01
+    """
+    parser = argparse.ArgumentParser(description="Export order history to a CSV or JSONL file.")
+    parser.add_argument('path', help="Destination .csv or .jsonl file.")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+    parser.add_argument('--user', help="Only export orders placed by this username.")
+    parser.add_argument('--status', help="Only export orders with this status, e.g. 'Delivered'.")
+    parser.add_argument('--start', help="Only export orders created at or after this date (ISO 8601 or Unix time).")
+    parser.add_argument('--end', help="Only export orders created before this date (ISO 8601 or Unix time).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    data_store = DataStore(User(username=args.user or 'export'))
+    try:
+        count = data_store.export_orders(
+            args.path,
+            fmt=args.format,
+            user=args.user,
+            status=args.status,
+            start=args.start,
+            end=args.end
+        )
+        print(f"Exported {count} records to {args.path}")
+    finally:
+        data_store.close_connection()
+
+if __name__ == '__main__':
+    main()
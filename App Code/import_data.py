@@ -0,0 +1,37 @@
+# import_data.py
+
+import argparse
+import logging
+from models.data_store import DataStore
+from models.user import User
+
+def main():
+    """
+    Headless entry point for bulk importing product catalogs and historical orders.
+
+    Usage:
+        python import_data.py products catalog.csv
+        python import_data.py orders orders.jsonl
+    """
+    parser = argparse.ArgumentParser(description="Bulk import products or historical orders into the data store.")
+    parser.add_argument('kind', choices=['products', 'orders'], help="What the file contains.")
+    parser.add_argument('path', help="Path to a .csv or .jsonl file.")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Records per transaction.")
+    parser.add_argument('--user', default='import', help="Username the data store is opened as.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    data_store = DataStore(User(username=args.user))
+    try:
+        if args.kind == 'products':
+            report = data_store.import_products(args.path, chunk_size=args.chunk_size)
+        else:
+            report = data_store.import_orders(args.path, chunk_size=args.chunk_size)
+        print(f"Imported {report['rows']} {args.kind} in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/s)")
+        if report['skipped']:
+            print(f"Skipped {report['skipped']} invalid records; see the log for details.")
+    finally:
+        data_store.close_connection()
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,109 @@
 # models/data_store.py
 
 import sqlite3
+import threading
+import time
 from models.product import Product
 from models.order_item import OrderItem
 from models.order import Order
 from models.order_status import OrderStatus
 from models.user import User
+from models.identity_map import OrderIdentityMap
+from utils.connection_pool import ConnectionPool
+from utils.write_behind import WriteBehindQueue
+from utils.id_allocator import IdAllocator
+from utils.event_bus import OrderEvent, ORDER_STATUS_CHANGED
+from utils.bulk_import import iter_records, iter_order_records, chunked, parse_timestamp
+from utils.bulk_export import ORDER_LINE_FIELDS, export_format, write_csv, write_jsonl
+from config import DATABASE_PATH, ARCHIVE_DATABASE_PATH
 import logging
 
 class DataStore:
-    def __init__(self, user):
+    def __init__(self, user, database=DATABASE_PATH, write_behind=False,
+                 flush_interval=1.0, flush_batch_size=200,
+                 archive_database=ARCHIVE_DATABASE_PATH, archive_after_days=None, event_bus=None):
         """
         Initialize the DataStore, connecting to the SQLite database.
         Loads products and orders from the database into memory.
         
+        Connections come from a per-thread pool, so the DataStore may be used from
+        background threads as well as the Tk thread.
+        
         Parameters:
             user (User): The user instance associated with this data store.
+            database (str, optional): Path to the SQLite database file.
+            write_behind (bool, optional): Queue status and inventory updates and commit
+                them in batches instead of one commit per update.
+            flush_interval (float, optional): Seconds between write-behind flushes.
+            flush_batch_size (int, optional): Pending updates that trigger an early flush.
+            archive_database (str, optional): Path to the archive database attached as 'archive'.
+            archive_after_days (float, optional): If set, finished orders older than this are
+                moved to the archive before orders are loaded.
+            event_bus (EventBus, optional): If set, every order status change applied here,
+                including ones pulled in from other writers, is published with source 'data_store'.
         """
         self.user = user
+        self.event_bus = event_bus
         self.products = []  # List of Product instances
         self.orders = []    # List of Order instances
 
+        # Hash index over the product list for O(1) lookups
+        self.products_by_id = {}            # product_id -> Product
+        # One live Order per order_id, indexed by internal and external ID
+        self.identity_map = OrderIdentityMap()
+
+        # Change tracking for incremental refresh from other writers
+        self.last_data_version = None
+        self.products_version = 0   # Highest products.row_version loaded
+        self.orders_version = 0     # Highest orders.row_version loaded
+        self.deletions_version = 0  # Highest row_deletions.row_version applied
+
+        # Guards the in-memory lists and indexes against concurrent mutation
+        self.lock = threading.RLock()
+        self.write_behind = None
+        self.archive_page_start = None  # Lowest archived order_id paged in so far
+        # Archived orders already in the paged history. Search hits are registered in the
+        # identity map without joining the history, so the map cannot answer this.
+        self.paged_archive_ids = set()
+
+        # Item loaders shared by every lazily loaded Order, keyed by schema
+        self.items_loaders = {
+            'main': lambda order_id: self.load_order_items(order_id, 'main'),
+            'archive': lambda order_id: self.load_order_items(order_id, 'archive'),
+        }
+
         # Connect to the SQLite database
-        self.conn = sqlite3.connect('data_store.db')
+        self.pool = ConnectionPool(database, attachments={'archive': archive_database})
         self.create_tables()
+
+        # Block-reserved, collision-free IDs for new orders and for the external API
+        self.order_ids = IdAllocator(database, 'orders')
+        self.external_order_ids = IdAllocator(database, 'external_orders')
+
         self.load_products()
+        if archive_after_days is not None:
+            self.archive_finished_orders(archive_after_days)
         self.load_orders()
+        self.has_external_changes()  # Record the starting data_version
+
+        # Optional write-behind queue for status and inventory updates
+        if write_behind:
+            self.write_behind = WriteBehindQueue(lambda: self.conn, flush_interval, flush_batch_size)
+
+    @property
+    def conn(self):
+        """
+        The SQLite connection owned by the calling thread.
+        
+        Returns:
+            sqlite3.Connection: A pooled connection for the current thread.
+        """
+        return self.pool.get_connection()
 
     def create_tables(self):
         """
-        Create the necessary tables (orders, products) in the SQLite database if they don't exist.
+        Create the necessary tables (orders, order_items, products) in the SQLite database
+        if they don't exist, then run any pending schema migrations.
         """
         cursor = self.conn.cursor()
         # Create orders table
@@ -37,12 +111,12 @@ class DataStore:
             CREATE TABLE IF NOT EXISTS orders (
                 order_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user TEXT,
-                items TEXT,
                 total_price REAL,
                 status TEXT,
                 external_order_id INTEGER
             )
         ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_user ON orders (user)')
 
         # Create products table
         cursor.execute('''
@@ -54,8 +128,365 @@ class DataStore:
             )
         ''')
 
+        # Create order_items table (one row per order line)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS order_items (
+                order_id INTEGER NOT NULL REFERENCES orders(order_id),
+                product_id INTEGER NOT NULL REFERENCES products(product_id),
+                quantity INTEGER NOT NULL,
+                unit_price REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (product_id)')
+
+        # Archive tables for finished orders, in the attached archive database
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.orders (
+                order_id INTEGER PRIMARY KEY,
+                user TEXT,
+                total_price REAL,
+                status TEXT,
+                external_order_id INTEGER,
+                created_at REAL,
+                archived_at REAL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_orders_user ON orders (user, order_id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.order_items (
+                order_id INTEGER NOT NULL,
+                product_id INTEGER NOT NULL,
+                quantity INTEGER NOT NULL,
+                unit_price REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_order_items_order ON order_items (order_id)')
+
+        self.conn.commit()
+        self.migrate_schema()
+
+    def migrate_schema(self):
+        """
+        Upgrade an existing database to the current schema version.
+        The version is tracked with SQLite's user_version pragma so each step runs only once.
+        """
+        cursor = self.conn.cursor()
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+
+        if version < 1:
+            # Move the legacy "pid,qty;pid,qty" items column into order_items
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(orders)')]
+            if 'items' in columns:
+                cursor.execute('SELECT order_id, items FROM orders')
+                line_items = []
+                for order_id, items_str in cursor.fetchall():
+                    for item_str in (items_str or '').split(';'):
+                        if item_str:
+                            try:
+                                product_id_str, quantity_str = item_str.split(',')
+                                line_items.append((order_id, int(product_id_str), int(quantity_str), int(product_id_str)))
+                            except ValueError:
+                                print(f"Invalid item format: {item_str}")
+                                continue
+                cursor.executemany('''
+                    INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+                    VALUES (?, ?, ?, COALESCE((SELECT price FROM products WHERE product_id = ?), 0))
+                ''', line_items)
+                logging.info(f"Migrated {len(line_items)} order lines into order_items.")
+            cursor.execute('PRAGMA user_version = 1')
+
+        if version < 2:
+            # Per-row change counters so other instances' writes can be pulled incrementally
+            for table, key in (('orders', 'order_id'), ('products', 'product_id')):
+                columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+                if 'row_version' not in columns:
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0')
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_row_version ON {table} (row_version)')
+                tracked = [column for column in columns if column not in (key, 'row_version')]
+                bump = f'''
+                    UPDATE {table} SET row_version = (SELECT COALESCE(MAX(row_version), 0) + 1 FROM {table})
+                    WHERE {key} = NEW.{key};
+                '''
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_row_version_insert AFTER INSERT ON {table}
+                    BEGIN {bump} END
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_row_version_update
+                    AFTER UPDATE OF {', '.join(tracked)} ON {table}
+                    BEGIN {bump} END
+                ''')
+            cursor.execute('PRAGMA user_version = 2')
+
+        if version < 3:
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(orders)')]
+            if 'created_at' not in columns:
+                cursor.execute('ALTER TABLE orders ADD COLUMN created_at REAL')
+            self.create_rollup_tables(cursor)
+            cursor.execute('PRAGMA user_version = 3')
+
+        if version < 4:
+            # Catalog keys for bulk upserts
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(products)')]
+            if 'sku' not in columns:
+                cursor.execute('ALTER TABLE products ADD COLUMN sku TEXT')
+            cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products (sku) WHERE sku IS NOT NULL')
+            try:
+                cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_products_name ON products (name)')
+            except sqlite3.IntegrityError:
+                logging.warning("Duplicate product names found; importing products by name will fail until they are resolved.")
+            cursor.execute('PRAGMA user_version = 4')
+
+        if version < 5:
+            # Full-text index over order IDs and line product names, one document per order
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS order_search USING fts5(
+                    order_id, external_order_id, product_names, user UNINDEXED,
+                    prefix='1 2 3'
+                )
+            ''')
+            self.index_orders_for_search(cursor, schema='archive')
+            self.index_orders_for_search(cursor)
+            cursor.execute('PRAGMA user_version = 5')
+
+        if version < 6:
+            # Named ID sequences handed out in blocks by IdAllocator, seeded past every ID in use
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS id_sequences (
+                    name TEXT PRIMARY KEY,
+                    next_id INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                INSERT OR IGNORE INTO id_sequences (name, next_id) VALUES
+                    ('orders', MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'orders'), 0),
+                                   COALESCE((SELECT MAX(order_id) FROM main.orders), 0),
+                                   COALESCE((SELECT MAX(order_id) FROM archive.orders), 0)) + 1),
+                    ('external_orders', MAX(100000,
+                                            COALESCE((SELECT MAX(external_order_id) FROM main.orders), 0) + 1,
+                                            COALESCE((SELECT MAX(external_order_id) FROM archive.orders), 0) + 1))
+            ''')
+            cursor.execute('PRAGMA user_version = 6')
+
+        if version < 7:
+            # Take row versions from one monotonic counter. MAX(row_version) + 1 handed out a
+            # number again once the row holding it was deleted (e.g. archived), so other
+            # instances already past that number never saw the change. Deletions leave a
+            # tombstone under a fresh version so other instances can drop the row too.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS row_deletions (
+                    table_name TEXT NOT NULL,
+                    row_key INTEGER NOT NULL,
+                    row_version INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_row_deletions_version ON row_deletions (row_version)')
+            cursor.execute('''
+                INSERT OR IGNORE INTO id_sequences (name, next_id) VALUES
+                    ('row_version', MAX(COALESCE((SELECT MAX(row_version) FROM orders), 0),
+                                        COALESCE((SELECT MAX(row_version) FROM products), 0)) + 1)
+            ''')
+            take_version = '''
+                UPDATE id_sequences SET next_id = next_id + 1 WHERE name = 'row_version';
+            '''
+            taken_version = "(SELECT next_id - 1 FROM id_sequences WHERE name = 'row_version')"
+            for table, key in (('orders', 'order_id'), ('products', 'product_id')):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {table}_row_version_insert')
+                cursor.execute(f'DROP TRIGGER IF EXISTS {table}_row_version_update')
+                bump = f'''
+                    {take_version}
+                    UPDATE {table} SET row_version = {taken_version} WHERE {key} = NEW.{key};
+                '''
+                cursor.execute(f'''
+                    CREATE TRIGGER {table}_row_version_insert AFTER INSERT ON {table}
+                    BEGIN {bump} END
+                ''')
+                # Any column change counts, including columns added by later migrations;
+                # the WHEN clause skips the trigger's own row_version write
+                cursor.execute(f'''
+                    CREATE TRIGGER {table}_row_version_update AFTER UPDATE ON {table}
+                    WHEN NEW.row_version IS OLD.row_version
+                    BEGIN {bump} END
+                ''')
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_row_version_delete AFTER DELETE ON {table}
+                    BEGIN
+                        {take_version}
+                        INSERT INTO row_deletions (table_name, row_key, row_version)
+                        VALUES ('{table}', OLD.{key}, {taken_version});
+                    END
+                ''')
+            cursor.execute('PRAGMA user_version = 7')
+
+        if version < 8:
+            # Lets the startup archiving pass find finished, old orders without scanning the table
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at)')
+            cursor.execute('PRAGMA user_version = 8')
+
         self.conn.commit()
 
+    def create_rollup_tables(self, cursor):
+        """
+        Create the order rollup tables, the triggers that keep them current, and backfill
+        them from existing orders. Because the triggers fire inside the writing statement,
+        every insert, status change and cancellation updates the rollups in the same
+        transaction, whichever connection or code path performs it.
+        
+        Rollups kept:
+            order_totals_by_user: order count, units and revenue per user (cancelled orders excluded).
+            order_totals_by_status: order count and revenue per user and current status.
+            order_totals_by_product: units and revenue per product (cancelled orders excluded).
+            order_totals_by_day: order count, units and revenue per local calendar day (cancelled orders excluded).
+        
+        Parameters:
+            cursor (sqlite3.Cursor): The cursor to execute the statements on.
+        """
+        cancelled = OrderStatus.CANCELLED.value
+        cursor.executescript(f'''
+            CREATE TABLE IF NOT EXISTS order_totals_by_user (
+                user TEXT PRIMARY KEY,
+                order_count INTEGER NOT NULL DEFAULT 0,
+                units INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS order_totals_by_status (
+                user TEXT NOT NULL,
+                status TEXT NOT NULL,
+                order_count INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (user, status)
+            );
+            CREATE TABLE IF NOT EXISTS order_totals_by_product (
+                product_id INTEGER PRIMARY KEY,
+                units INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS order_totals_by_day (
+                day TEXT PRIMARY KEY,
+                order_count INTEGER NOT NULL DEFAULT 0,
+                units INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0
+            );
+
+            -- A new order counts towards its user, status and day; its value arrives with its lines
+            CREATE TRIGGER IF NOT EXISTS rollup_order_insert AFTER INSERT ON orders
+            BEGIN
+                INSERT INTO order_totals_by_status (user, status, order_count) VALUES (NEW.user, NEW.status, 1)
+                    ON CONFLICT(user, status) DO UPDATE SET order_count = order_count + 1;
+                INSERT INTO order_totals_by_user (user, order_count)
+                    SELECT NEW.user, 1 WHERE NEW.status != '{cancelled}'
+                    ON CONFLICT(user) DO UPDATE SET order_count = order_count + 1;
+                INSERT INTO order_totals_by_day (day, order_count)
+                    SELECT date(NEW.created_at, 'unixepoch', 'localtime'), 1
+                    WHERE NEW.created_at IS NOT NULL AND NEW.status != '{cancelled}'
+                    ON CONFLICT(day) DO UPDATE SET order_count = order_count + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS rollup_order_item_insert AFTER INSERT ON order_items
+            BEGIN
+                UPDATE order_totals_by_status
+                    SET revenue = revenue + NEW.quantity * NEW.unit_price
+                    WHERE (user, status) = (SELECT user, status FROM orders WHERE order_id = NEW.order_id);
+                UPDATE order_totals_by_user
+                    SET units = units + NEW.quantity, revenue = revenue + NEW.quantity * NEW.unit_price
+                    WHERE user = (SELECT user FROM orders WHERE order_id = NEW.order_id AND status != '{cancelled}');
+                INSERT INTO order_totals_by_product (product_id, units, revenue)
+                    SELECT NEW.product_id, NEW.quantity, NEW.quantity * NEW.unit_price
+                    FROM orders WHERE order_id = NEW.order_id AND status != '{cancelled}'
+                    ON CONFLICT(product_id) DO UPDATE SET
+                        units = units + excluded.units, revenue = revenue + excluded.revenue;
+                UPDATE order_totals_by_day
+                    SET units = units + NEW.quantity, revenue = revenue + NEW.quantity * NEW.unit_price
+                    WHERE day = (SELECT date(created_at, 'unixepoch', 'localtime') FROM orders
+                                 WHERE order_id = NEW.order_id AND status != '{cancelled}');
+            END;
+
+            -- Move the order between status buckets
+            CREATE TRIGGER IF NOT EXISTS rollup_order_status_update AFTER UPDATE OF status ON orders
+            WHEN OLD.status != NEW.status
+            BEGIN
+                UPDATE order_totals_by_status
+                    SET order_count = order_count - 1,
+                        revenue = revenue - (SELECT COALESCE(SUM(quantity * unit_price), 0) FROM order_items WHERE order_id = NEW.order_id)
+                    WHERE user = OLD.user AND status = OLD.status;
+                INSERT INTO order_totals_by_status (user, status, order_count, revenue)
+                    SELECT NEW.user, NEW.status, 1, COALESCE(SUM(quantity * unit_price), 0)
+                    FROM order_items WHERE order_id = NEW.order_id
+                    ON CONFLICT(user, status) DO UPDATE SET
+                        order_count = order_count + 1, revenue = revenue + excluded.revenue;
+            END;
+
+            -- Cancelling an order removes it from the user, product and day totals
+            CREATE TRIGGER IF NOT EXISTS rollup_order_cancel AFTER UPDATE OF status ON orders
+            WHEN NEW.status = '{cancelled}' AND OLD.status != '{cancelled}'
+            BEGIN
+                UPDATE order_totals_by_user SET
+                    order_count = order_count - 1,
+                    units = units - (SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE order_id = NEW.order_id),
+                    revenue = revenue - (SELECT COALESCE(SUM(quantity * unit_price), 0) FROM order_items WHERE order_id = NEW.order_id)
+                    WHERE user = NEW.user;
+                UPDATE order_totals_by_product SET
+                    units = units - (SELECT SUM(quantity) FROM order_items
+                                     WHERE order_id = NEW.order_id AND product_id = order_totals_by_product.product_id),
+                    revenue = revenue - (SELECT SUM(quantity * unit_price) FROM order_items
+                                         WHERE order_id = NEW.order_id AND product_id = order_totals_by_product.product_id)
+                    WHERE product_id IN (SELECT product_id FROM order_items WHERE order_id = NEW.order_id);
+                UPDATE order_totals_by_day SET
+                    order_count = order_count - 1,
+                    units = units - (SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE order_id = NEW.order_id),
+                    revenue = revenue - (SELECT COALESCE(SUM(quantity * unit_price), 0) FROM order_items WHERE order_id = NEW.order_id)
+                    WHERE day = date(NEW.created_at, 'unixepoch', 'localtime');
+            END;
+        ''')
+
+        # Backfill from existing orders
+        cursor.execute('DELETE FROM order_totals_by_user')
+        cursor.execute('DELETE FROM order_totals_by_status')
+        cursor.execute('DELETE FROM order_totals_by_product')
+        cursor.execute('DELETE FROM order_totals_by_day')
+        cursor.execute('''
+            WITH order_values AS (
+                SELECT o.order_id, o.user, o.status, o.created_at,
+                       COALESCE(SUM(oi.quantity), 0) AS units,
+                       COALESCE(SUM(oi.quantity * oi.unit_price), 0) AS revenue
+                FROM orders o LEFT JOIN order_items oi ON oi.order_id = o.order_id
+                GROUP BY o.order_id
+            )
+            INSERT INTO order_totals_by_status (user, status, order_count, revenue)
+            SELECT user, status, COUNT(*), SUM(revenue) FROM order_values GROUP BY user, status
+        ''')
+        cursor.execute(f'''
+            WITH order_values AS (
+                SELECT o.order_id, o.user, COALESCE(SUM(oi.quantity), 0) AS units,
+                       COALESCE(SUM(oi.quantity * oi.unit_price), 0) AS revenue
+                FROM orders o LEFT JOIN order_items oi ON oi.order_id = o.order_id
+                WHERE o.status != '{cancelled}'
+                GROUP BY o.order_id
+            )
+            INSERT INTO order_totals_by_user (user, order_count, units, revenue)
+            SELECT user, COUNT(*), SUM(units), SUM(revenue) FROM order_values GROUP BY user
+        ''')
+        cursor.execute(f'''
+            INSERT INTO order_totals_by_product (product_id, units, revenue)
+            SELECT oi.product_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price)
+            FROM order_items oi JOIN orders o ON o.order_id = oi.order_id
+            WHERE o.status != '{cancelled}'
+            GROUP BY oi.product_id
+        ''')
+        cursor.execute(f'''
+            WITH order_values AS (
+                SELECT o.order_id, date(o.created_at, 'unixepoch', 'localtime') AS day,
+                       COALESCE(SUM(oi.quantity), 0) AS units,
+                       COALESCE(SUM(oi.quantity * oi.unit_price), 0) AS revenue
+                FROM orders o LEFT JOIN order_items oi ON oi.order_id = o.order_id
+                WHERE o.status != '{cancelled}' AND o.created_at IS NOT NULL
+                GROUP BY o.order_id
+            )
+            INSERT INTO order_totals_by_day (day, order_count, units, revenue)
+            SELECT day, COUNT(*), SUM(units), SUM(revenue) FROM order_values GROUP BY day
+        ''')
+
     def add_order(self, order):
         """
         Add an order to the database and in-memory lists.
@@ -63,58 +494,316 @@ class DataStore:
         Parameters:
             order (Order): The Order instance to add.
         """
-        self.orders.append(order)
-        self.user.place_order(order)  # Add to user's order history
-
         # Save to database
-        cursor = self.conn.cursor()
-        items_str = ';'.join([f"{item.product.product_id},{item.quantity}" for item in order.items])
+        self.use_canonical_products(order)
+        self.assign_order_id(order)
+        conn = self.conn
+        self.insert_order_rows(conn.cursor(), order)
+        conn.commit()
+        self.add_to_memory(order)
+
+    def use_canonical_products(self, order):
+        """
+        Point every item of an order at the shared Product instance from self.products,
+        so each product exists once in memory however many orders reference it.
+        
+        Parameters:
+            order (Order): The order whose items should be updated.
+        """
+        for item in order.items:
+            product = self.products_by_id.get(item.product.product_id)
+            if product is not None:
+                item.product = product
+
+    def assign_order_id(self, order):
+        """
+        Give a new order its internal ID from the block allocator, if it does not have one yet.
+        Call this before opening the transaction that inserts the order.
+        
+        Parameters:
+            order (Order): The order to number.
+        """
+        if order.order_id is None:
+            order.order_id = self.order_ids.next_id()
+
+    def insert_order_rows(self, cursor, order):
+        """
+        Insert an order and its line items without committing.
+        The order must already have an ID from assign_order_id.
+        
+        Parameters:
+            cursor (sqlite3.Cursor): The cursor to execute the inserts on.
+            order (Order): The Order instance to insert.
+        """
+        if order.created_at is None:
+            order.created_at = time.time()
         cursor.execute('''
-            INSERT INTO orders (user, items, total_price, status, external_order_id)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO orders (order_id, user, total_price, status, external_order_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
         ''', (
+            order.order_id,
             order.user.username,
-            items_str,
             order.get_total_order_price(),
             order.status.value,
-            order.external_order_id
+            order.external_order_id,
+            order.created_at
         ))
-        self.conn.commit()
-        order.order_id = cursor.lastrowid  # Assign the auto-generated order_id
+        cursor.executemany('''
+            INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            (order.order_id, item.product.product_id, item.quantity, item.unit_price)
+            for item in order.items
+        ])
+        self.index_orders_for_search(cursor, order.order_id, order.order_id)
+
+    def index_orders_for_search(self, cursor, first_order_id=None, last_order_id=None, schema='main'):
+        """
+        (Re)build the full-text search documents for a range of orders.
+        
+        Parameters:
+            cursor (sqlite3.Cursor): The cursor to execute the statements on.
+            first_order_id (int, optional): Lowest order_id to index; defaults to all orders.
+            last_order_id (int, optional): Highest order_id to index; defaults to all orders.
+            schema (str, optional): 'main', or 'archive' to index archived orders.
+        """
+        bounds = (
+            first_order_id if first_order_id is not None else 0,
+            last_order_id if last_order_id is not None else 9223372036854775807,
+        )
+        cursor.execute(f'''
+            DELETE FROM order_search
+            WHERE rowid IN (SELECT order_id FROM {schema}.orders WHERE order_id BETWEEN ? AND ?)
+        ''', bounds)
+        cursor.execute(f'''
+            INSERT INTO order_search (rowid, order_id, external_order_id, product_names, user)
+            SELECT o.order_id, o.order_id, COALESCE(o.external_order_id, ''),
+                   COALESCE(group_concat(p.name, ' | '), ''), o.user
+            FROM {schema}.orders o
+            LEFT JOIN {schema}.order_items oi ON oi.order_id = o.order_id
+            LEFT JOIN main.products p ON p.product_id = oi.product_id
+            WHERE o.order_id BETWEEN ? AND ?
+            GROUP BY o.order_id
+        ''', bounds)
+
+    def search_orders(self, query, limit=200):
+        """
+        Full-text search the current user's orders by product name, order ID or external ID.
+        Every word in the query is matched as a prefix, so partial input works while typing.
+        Archived orders that match are loaded from the archive but not added to the history.
+        
+        Parameters:
+            query (str): The text to search for.
+            limit (int, optional): Maximum number of orders to return.
+            
+        Returns:
+            list of Order: Matching orders, most relevant first.
+        """
+        terms = [term.replace('"', '""') for term in query.split()]
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT rowid FROM order_search
+            WHERE order_search MATCH ? AND user = ?
+            ORDER BY rank LIMIT ?
+        ''', (match, self.user.username, limit))
+        order_ids = [row[0] for row in cursor.fetchall()]
+
+        orders = []
+        for order_id in order_ids:
+            order = self.identity_map.get(order_id) or self.get_archived_order(order_id)
+            if order:
+                orders.append(order)
+        return orders
+
+    def get_archived_order(self, order_id):
+        """
+        Load a single order from the archive database and register it in the identity map.
+        
+        Parameters:
+            order_id (int): The internal order ID.
+            
+        Returns:
+            The Order instance, or None if it is not in the archive.
+        """
+        row = self.conn.execute('''
+            SELECT status, external_order_id, created_at FROM archive.orders WHERE order_id = ?
+        ''', (order_id,)).fetchone()
+        if row is None:
+            return None
+        return self.identity_map.register(self.build_order(order_id, row[0], row[1], row[2], schema='archive'))
+
+    def place_order_atomic(self, order):
+        """
+        Insert an order and decrement inventory for each of its items in a single transaction.
+        Inventory is only taken if enough stock remains, so concurrent placements cannot
+        oversell. If any line cannot be filled, nothing is written.
+        
+        Parameters:
+            order (Order): The Order instance to place.
+            
+        Returns:
+            list of OrderItem: The items that failed for lack of stock. Empty if the order was placed.
+        """
+        # Queued absolute inventory writes must land before the relative decrements
+        self.flush()
+        self.use_canonical_products(order)
+        self.assign_order_id(order)
+
+        conn = self.conn
+        cursor = conn.cursor()
+        failed_items = []
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for item in order.items:
+                cursor.execute('''
+                    UPDATE products SET inventory = inventory - ?
+                    WHERE product_id = ? AND inventory >= ?
+                ''', (item.quantity, item.product.product_id, item.quantity))
+                if cursor.rowcount == 0:
+                    failed_items.append(item)
+
+            if failed_items:
+                conn.rollback()
+            else:
+                self.insert_order_rows(cursor, order)
+                conn.commit()
+        except Exception as e:
+            # Whatever failed, release the write lock taken by BEGIN IMMEDIATE
+            conn.rollback()
+            logging.error(f"Failed to place order: {e}")
+            raise
+
+        # Refresh in-memory products from the database
+        product_ids = {item.product.product_id for item in order.items}
+        placeholders = ','.join('?' * len(product_ids))
+        cursor.execute(f'SELECT product_id, inventory FROM products WHERE product_id IN ({placeholders})',
+                       tuple(product_ids))
+        for product_id, inventory in cursor.fetchall():
+            product = self.products_by_id.get(product_id)
+            if product:
+                product.inventory = inventory
+
+        if not failed_items:
+            self.add_to_memory(order)
+        return failed_items
 
     def load_orders(self):
         """
-        Load all orders from the database that belong to the current user into memory.
+        Load the orders that belong to the current user into memory.
+        Line items are not read here; each Order fetches its own items the first time
+        they are accessed, so startup cost depends only on this user's order count.
         """
         cursor = self.conn.cursor()
-        cursor.execute('SELECT order_id, user, items, total_price, status, external_order_id FROM orders')
-        rows = cursor.fetchall()
-        for row in rows:
-            order_id, username, items_str, total_price, status_str, external_order_id = row
+        self.orders_version = cursor.execute('SELECT COALESCE(MAX(row_version), 0) FROM orders').fetchone()[0]
+        self.deletions_version = cursor.execute('SELECT COALESCE(MAX(row_version), 0) FROM row_deletions').fetchone()[0]
+        cursor.execute('''
+            SELECT order_id, total_price, status, external_order_id, created_at
+            FROM orders WHERE user = ?
+        ''', (self.user.username,))
+        for order_id, total_price, status_str, external_order_id, created_at in cursor.fetchall():
+            self.add_to_memory(self.build_order(order_id, status_str, external_order_id, created_at))
 
-            # Only load orders for the current user
-            if username != self.user.username:
+    def build_order(self, order_id, status_str, external_order_id, created_at=None, schema='main'):
+        """
+        Create an Order for a database row, with items loaded on first access.
+        
+        Parameters:
+            order_id (int): The internal order ID.
+            status_str (str): The stored OrderStatus value.
+            external_order_id (int): The external order ID.
+            created_at (float, optional): Unix timestamp when the order was placed.
+            schema (str, optional): 'main', or 'archive' for archived orders.
+            
+        Returns:
+            Order: The new Order instance.
+        """
+        order = Order(self.user, items_loader=self.items_loaders[schema])
+        order.order_id = order_id
+        order.external_order_id = external_order_id
+        order.status = OrderStatus(status_str)
+        order.created_at = created_at
+        return order
+
+    def load_order_items(self, order_id, schema='main'):
+        """
+        Load the line items of a single order from the database.
+        
+        Parameters:
+            order_id (int): The internal order ID whose items should be loaded.
+            schema (str, optional): 'main', or 'archive' for archived orders.
+            
+        Returns:
+            list of OrderItem: The order's items.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(f'''
+            SELECT product_id, quantity, unit_price FROM {schema}.order_items WHERE order_id = ?
+        ''', (order_id,))
+        items = []
+        for product_id, quantity, unit_price in cursor.fetchall():
+            product = self.get_product_by_id(product_id)
+            if product:
+                items.append(OrderItem(product, quantity, unit_price))
+        return items
+
+    def load_items_for_orders(self, orders, batch_size=900):
+        """
+        Load the line items of many lazily loaded orders with one query per batch of
+        orders, instead of one query per order on first access. Orders whose items
+        are already loaded are left alone.
+        
+        Parameters:
+            orders (iterable of Order): The orders about to have their items read.
+            batch_size (int, optional): Order IDs per query, kept under SQLite's variable limit.
+        """
+        pending = {schema: [] for schema in self.items_loaders}
+        for order in orders:
+            loader = order.items_loader
+            if loader is None:
                 continue
+            for schema, schema_loader in self.items_loaders.items():
+                if loader is schema_loader:
+                    pending[schema].append(order)
+                    break
 
-            items = []
-            for item_str in items_str.split(';'):
-                if item_str:
-                    try:
-                        product_id_str, quantity_str = item_str.split(',')
-                        product = self.get_product_by_id(int(product_id_str))
-                        if product:
-                            items.append(OrderItem(product, int(quantity_str)))
-                    except ValueError:
-                        print(f"Invalid item format: {item_str}")
-                        continue
+        cursor = self.conn.cursor()
+        products_by_id = self.products_by_id
+        for schema, schema_orders in pending.items():
+            for batch in chunked(schema_orders, batch_size):
+                items_by_order = {order.order_id: [] for order in batch}
+                placeholders = ','.join('?' * len(items_by_order))
+                cursor.execute(f'''
+                    SELECT order_id, product_id, quantity, unit_price FROM {schema}.order_items
+                    WHERE order_id IN ({placeholders})
+                ''', tuple(items_by_order))
+                for order_id, product_id, quantity, unit_price in cursor.fetchall():
+                    product = products_by_id.get(product_id)
+                    if product:
+                        items_by_order[order_id].append(OrderItem(product, quantity, unit_price))
+                for order in batch:
+                    order.items = items_by_order[order.order_id]
 
-            # Create Order instance
-            order = Order(self.user, items)
-            order.order_id = order_id
-            order.external_order_id = external_order_id
-            order.status = OrderStatus(status_str)
-            self.orders.append(order)
-            self.user.place_order(order)
+    def add_to_memory(self, order):
+        """
+        Register an order in the identity map and, if it is new, in the in-memory
+        order list and the user's order history.
+        
+        Parameters:
+            order (Order): The order to add.
+            
+        Returns:
+            Order: The canonical instance for the order's order_id.
+        """
+        with self.lock:
+            canonical = self.identity_map.register(order)
+            if canonical is order:
+                self.orders.append(order)
+                self.user.place_order(order)  # Add to user's order history
+            return canonical
 
     def get_order_by_id(self, order_id):
         """
@@ -126,10 +815,7 @@ class DataStore:
         Returns:
             The matching Order instance or None if not found.
         """
-        for order in self.orders:
-            if order.order_id == order_id:
-                return order
-        return None
+        return self.identity_map.get(order_id)
 
     def get_order_by_external_id(self, external_order_id):
         """
@@ -141,28 +827,349 @@ class DataStore:
         Returns:
             The matching Order instance or None if not found.
         """
-        for order in self.orders:
-            if order.external_order_id == external_order_id:
-                return order
-        return None
+        return self.identity_map.get_by_external_id(external_order_id)
+
+    def get_units_sold_per_product(self):
+        """
+        Aggregate the number of units ordered for each product, excluding cancelled orders.
+        
+        Returns:
+            dict: A mapping of product_id to total units sold.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT product_id, units FROM order_totals_by_product WHERE units > 0')
+        return dict(cursor.fetchall())
+
+    def get_summary(self):
+        """
+        Read the current user's order totals from the rollup tables.
+        The cost does not depend on the number of orders in the history.
+        
+        Returns:
+            dict: 'order_count', 'units' and 'revenue' for the user (cancelled orders excluded),
+                and 'by_status', a mapping of status value to {'order_count', 'revenue'}.
+        """
+        cursor = self.conn.cursor()
+        row = cursor.execute('''
+            SELECT order_count, units, revenue FROM order_totals_by_user WHERE user = ?
+        ''', (self.user.username,)).fetchone() or (0, 0, 0.0)
+        cursor.execute('''
+            SELECT status, order_count, revenue FROM order_totals_by_status
+            WHERE user = ? AND order_count > 0
+        ''', (self.user.username,))
+        by_status = {
+            status: {'order_count': order_count, 'revenue': revenue}
+            for status, order_count, revenue in cursor.fetchall()
+        }
+        return {
+            'order_count': row[0],
+            'units': row[1],
+            'revenue': row[2],
+            'by_status': by_status,
+        }
+
+    def get_product_totals(self):
+        """
+        Read units and revenue per product from the rollup table, excluding cancelled orders.
+        
+        Returns:
+            dict: A mapping of product_id to {'units', 'revenue'}.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT product_id, units, revenue FROM order_totals_by_product')
+        return {
+            product_id: {'units': units, 'revenue': revenue}
+            for product_id, units, revenue in cursor.fetchall()
+        }
+
+    def get_daily_totals(self, start_day=None, end_day=None):
+        """
+        Read order count, units and revenue per day from the rollup table, excluding cancelled orders.
+        
+        Parameters:
+            start_day (str, optional): First day to include, as 'YYYY-MM-DD'.
+            end_day (str, optional): Last day to include, as 'YYYY-MM-DD'.
+            
+        Returns:
+            list of tuple: (day, order_count, units, revenue) rows in day order.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT day, order_count, units, revenue FROM order_totals_by_day
+            WHERE day >= COALESCE(?, '') AND day <= COALESCE(?, '9999-12-31')
+            ORDER BY day
+        ''', (start_day, end_day))
+        return cursor.fetchall()
+
+    def get_order_snapshot(self, include_archive=True):
+        """
+        Read every order line into a columnar NumPy snapshot for analytics.
+        NumPy is only imported when a snapshot is requested.
+        
+        Parameters:
+            include_archive (bool, optional): Also read archived orders.
+            
+        Returns:
+            OrderSnapshot: Column arrays with vectorized group-by helpers.
+        """
+        from models.order_snapshot import OrderSnapshot
+        self.flush()
+        return OrderSnapshot.from_connection(self.conn, include_archive=include_archive)
+
+    def get_order_ids_containing_product(self, product_id):
+        """
+        Find every order that contains the given product.
+        
+        Parameters:
+            product_id (int): The ID of the product to search for.
+            
+        Returns:
+            list of int: The internal order IDs containing the product.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT order_id FROM order_items WHERE product_id = ?
+            UNION
+            SELECT order_id FROM archive.order_items WHERE product_id = ?
+            ORDER BY order_id
+        ''', (product_id, product_id))
+        return [row[0] for row in cursor.fetchall()]
+
+    def archive_finished_orders(self, older_than_days):
+        """
+        Move delivered and cancelled orders older than the given age, with their line items,
+        from the hot tables into the attached archive database. Archived orders are also
+        dropped from memory. Rollup totals are left as they are, so lifetime figures still
+        include archived orders.
+        
+        Parameters:
+            older_than_days (float): Minimum age in days, based on created_at. Orders without
+                a created_at (from before it was recorded) have an unknown age and stay hot.
+                
+        Returns:
+            int: The number of orders archived.
+        """
+        # Queued status writes must land before rows leave the hot table
+        self.flush()
+
+        cutoff = time.time() - older_than_days * 86400
+        finished = (OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value)
+        conn = self.conn
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS archiving (order_id INTEGER PRIMARY KEY)
+            ''')
+            cursor.execute('DELETE FROM temp.archiving')
+            cursor.execute('''
+                INSERT INTO temp.archiving
+                SELECT order_id FROM orders
+                WHERE status IN (?, ?) AND created_at IS NOT NULL AND created_at < ?
+            ''', finished + (cutoff,))
+            # Copy first; INSERT OR IGNORE makes a retry after a partial run harmless
+            cursor.execute('''
+                INSERT OR IGNORE INTO archive.orders
+                    (order_id, user, total_price, status, external_order_id, created_at, archived_at)
+                SELECT order_id, user, total_price, status, external_order_id, created_at, ?
+                FROM orders WHERE order_id IN (SELECT order_id FROM temp.archiving)
+            ''', (time.time(),))
+            cursor.execute('''
+                DELETE FROM archive.order_items WHERE order_id IN (SELECT order_id FROM temp.archiving)
+            ''')
+            cursor.execute('''
+                INSERT INTO archive.order_items (order_id, product_id, quantity, unit_price)
+                SELECT order_id, product_id, quantity, unit_price
+                FROM order_items WHERE order_id IN (SELECT order_id FROM temp.archiving)
+            ''')
+            cursor.execute('DELETE FROM order_items WHERE order_id IN (SELECT order_id FROM temp.archiving)')
+            cursor.execute('DELETE FROM orders WHERE order_id IN (SELECT order_id FROM temp.archiving)')
+            archived_ids = {row[0] for row in cursor.execute('SELECT order_id FROM temp.archiving')}
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Failed to archive orders: {e}")
+            raise
+
+        if archived_ids:
+            self.drop_from_memory(archived_ids)
+            logging.info(f"Archived {len(archived_ids)} finished orders.")
+        return len(archived_ids)
+
+    def drop_from_memory(self, order_ids):
+        """
+        Remove orders that left the hot tables from the identity map, the order list
+        and the user's order history.
+        
+        Parameters:
+            order_ids (set of int): The internal order IDs to drop.
+        """
+        with self.lock:
+            for order in [o for o in self.orders if o.order_id in order_ids]:
+                self.identity_map.remove(order)
+            self.orders = [o for o in self.orders if o.order_id not in order_ids]
+            self.user.order_history = [o for o in self.user.order_history if o.order_id not in order_ids]
+
+    def load_archived_orders(self, before_order_id=None, limit=100):
+        """
+        Page older orders for the current user in from the archive database.
+        The orders are added in front of the user's order history, oldest first, and their
+        items are read from the archive on first access.
+        
+        Parameters:
+            before_order_id (int, optional): Only load orders with a lower order_id. Defaults to
+                continuing below the last page loaded, starting from the newest archived order.
+            limit (int, optional): Maximum number of orders to load.
+            
+        Returns:
+            list of Order: The loaded orders, oldest first.
+        """
+        if before_order_id is None:
+            before_order_id = self.archive_page_start
+
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT order_id, status, external_order_id, created_at FROM archive.orders
+            WHERE user = ? AND order_id < COALESCE(?, 9223372036854775807)
+            ORDER BY order_id DESC LIMIT ?
+        ''', (self.user.username, before_order_id, limit))
+        rows = cursor.fetchall()
+        if rows:
+            self.archive_page_start = rows[-1][0]
+        orders = []
+        for order_id, status_str, external_order_id, created_at in reversed(rows):
+            if order_id in self.paged_archive_ids:
+                continue
+            # An order found earlier by search is already mapped; page in that instance
+            order = self.identity_map.register(
+                self.build_order(order_id, status_str, external_order_id, created_at, schema='archive'))
+            self.paged_archive_ids.add(order_id)
+            orders.append(order)
+
+        with self.lock:
+            self.orders[:0] = orders
+            self.user.order_history[:0] = orders
+        return orders
 
     def load_products(self):
         """
         Load products from the database. If none exist, insert predefined products first.
         """
         cursor = self.conn.cursor()
-        cursor.execute('SELECT product_id, name, price, inventory FROM products')
+        cursor.execute('SELECT product_id, name, price, inventory, row_version FROM products')
         rows = cursor.fetchall()
         if not rows:
             # Insert predefined products if none exist
             self.insert_predefined_products()
-            cursor.execute('SELECT product_id, name, price, inventory FROM products')
+            cursor.execute('SELECT product_id, name, price, inventory, row_version FROM products')
             rows = cursor.fetchall()
 
         self.products = [
             Product(product_id=row[0], name=row[1], price=row[2], inventory=row[3])
             for row in rows
         ]
+        self.products_by_id = {product.product_id: product for product in self.products}
+        self.products_version = max(row[4] for row in rows)
+
+    def has_external_changes(self):
+        """
+        Cheaply check whether the database file changed since the last call.
+        Uses PRAGMA data_version, which only changes when another connection commits.
+        
+        Returns:
+            bool: True if another connection has committed since the last check.
+        """
+        data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        changed = data_version != self.last_data_version
+        self.last_data_version = data_version
+        return changed
+
+    def refresh_from_database(self, force=False):
+        """
+        Pull products and orders changed or deleted by other writers into the in-memory lists.
+        Only rows and deletions whose row_version is above the last synced high-water mark are read.
+        
+        Parameters:
+            force (bool, optional): Skip the data_version check, e.g. after this thread
+                wrote rows outside the usual in-memory paths.
+        
+        Returns:
+            bool: True if any in-memory data changed.
+        """
+        if not self.has_external_changes() and not force:
+            return False
+
+        # Our own queued writes must not be overwritten by older database values
+        self.flush()
+
+        changed = False
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT product_id, name, price, inventory, row_version FROM products
+            WHERE row_version > ? ORDER BY row_version
+        ''', (self.products_version,))
+        for product_id, name, price, inventory, row_version in cursor.fetchall():
+            with self.lock:
+                product = self.products_by_id.get(product_id)
+                if product is None:
+                    product = Product(product_id=product_id, name=name, price=price, inventory=inventory)
+                    self.products.append(product)
+                    self.products_by_id[product_id] = product
+                else:
+                    product.name = name
+                    product.price = price
+                    product.inventory = inventory
+            self.products_version = row_version
+            changed = True
+
+        cursor.execute('''
+            SELECT order_id, user, status, external_order_id, created_at, row_version FROM orders
+            WHERE row_version > ? ORDER BY row_version
+        ''', (self.orders_version,))
+        for order_id, username, status_str, external_order_id, created_at, row_version in cursor.fetchall():
+            self.orders_version = row_version
+            if username != self.user.username:
+                continue
+            order = self.identity_map.get(order_id)
+            if order is None:
+                self.add_to_memory(self.build_order(order_id, status_str, external_order_id, created_at))
+            else:
+                status = OrderStatus(status_str)
+                status_changed = order.status != status
+                order.status = status
+                order.created_at = created_at
+                if order.external_order_id != external_order_id:
+                    order.external_order_id = external_order_id
+                    self.identity_map.register(order)
+                if status_changed:
+                    self.publish_status(order)
+            changed = True
+
+        cursor.execute('''
+            SELECT table_name, row_key, row_version FROM row_deletions
+            WHERE row_version > ? ORDER BY row_version
+        ''', (self.deletions_version,))
+        deleted_order_ids = set()
+        for table_name, row_key, row_version in cursor.fetchall():
+            self.deletions_version = row_version
+            if table_name == 'orders':
+                deleted_order_ids.add(row_key)
+            elif table_name == 'products':
+                with self.lock:
+                    product = self.products_by_id.pop(row_key, None)
+                    if product is not None:
+                        self.products.remove(product)
+                        changed = True
+        if deleted_order_ids:
+            # Orders paged in from the archive are no longer in the hot table, so leave them
+            with self.lock:
+                hot_ids = {o.order_id for o in self.orders
+                           if o.order_id in deleted_order_ids and o.order_id not in self.paged_archive_ids}
+            if hot_ids:
+                self.drop_from_memory(hot_ids)
+                changed = True
+
+        return changed
 
     def insert_predefined_products(self):
         """
@@ -203,35 +1210,97 @@ class DataStore:
         Returns:
             The matching Product instance or None if not found.
         """
-        for product in self.products:
-            if product.product_id == product_id:
-                return product
-        return None
+        return self.products_by_id.get(product_id)
 
     def update_order_status(self, order):
         """
         Update the status of an order both in-memory and in the database.
+        The order list and the user's history share the canonical instance from the
+        identity map, so only that instance's status field needs to change.
         
         Parameters:
             order (Order): The order whose status is to be updated.
         """
-        # Update in-memory list
-        for idx, existing_order in enumerate(self.orders):
-            if existing_order.order_id == order.order_id:
-                self.orders[idx] = order
-                break
-        # Update user's order history
-        for idx, existing_order in enumerate(self.user.order_history):
-            if existing_order.order_id == order.order_id:
-                self.user.order_history[idx] = order
-                break
+        canonical = self.identity_map.get(order.order_id)
+        if canonical is not None and canonical is not order:
+            canonical.status = order.status
 
         # Update in database
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE orders SET status=? WHERE order_id=?
-        ''', (order.status.value, order.order_id))
-        self.conn.commit()
+        sql = 'UPDATE orders SET status=? WHERE order_id=?'
+        params = (order.status.value, order.order_id)
+        if self.write_behind:
+            self.write_behind.enqueue(('orders.status', order.order_id), sql, params)
+        else:
+            conn = self.conn
+            conn.execute(sql, params)
+            conn.commit()
+        self.publish_status(canonical or order)
+
+    def update_order_statuses(self, changes, flush=True):
+        """
+        Apply many status changes and persist them in a single transaction.
+        Orders whose status is already the new one are skipped.
+        
+        Parameters:
+            changes (iterable of tuple): (Order, OrderStatus) pairs.
+            flush (bool, optional): With write-behind enabled, commit the queue before
+                returning; pass False to let the changes go out with the next batch.
+            
+        Returns:
+            list of Order: The orders whose status changed.
+        """
+        changed = []
+        with self.lock:
+            for order, status in changes:
+                canonical = self.identity_map.get(order.order_id) or order
+                if canonical.status != status:
+                    canonical.status = status
+                    order.status = status
+                    changed.append(canonical)
+        if not changed:
+            return changed
+
+        sql = 'UPDATE orders SET status=? WHERE order_id=?'
+        if self.write_behind:
+            # Go through the queue so an older queued status cannot land after these
+            for order in changed:
+                self.write_behind.enqueue(('orders.status', order.order_id), sql, (order.status.value, order.order_id))
+            if flush:
+                self.write_behind.flush()
+        else:
+            conn = self.conn
+            with conn:
+                conn.executemany(sql, [(order.status.value, order.order_id) for order in changed])
+        for order in changed:
+            self.publish_status(order)
+        return changed
+
+    def publish_status(self, order):
+        """
+        Announce an order's current status on the event bus, if there is one.
+        
+        Parameters:
+            order (Order): The order whose status changed.
+        """
+        if self.event_bus is not None:
+            self.event_bus.publish(ORDER_STATUS_CHANGED, OrderEvent(
+                order=order,
+                external_order_id=order.external_order_id,
+                status=order.status,
+                source='data_store'
+            ))
+
+    def cancel_order(self, order):
+        """
+        Mark an order as cancelled and persist the change.
+        The rollup triggers remove the order from the user, product and day totals
+        in the same transaction as the status write.
+        
+        Parameters:
+            order (Order): The order to cancel.
+        """
+        order.status = OrderStatus.CANCELLED
+        self.update_order_status(order)
 
     def update_inventory(self, product_id, new_inventory):
         """
@@ -245,17 +1314,19 @@ class DataStore:
             bool: True if inventory updated successfully, False otherwise.
         """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                UPDATE products SET inventory = ? WHERE product_id = ?
-            ''', (new_inventory, product_id))
-            self.conn.commit()
+            sql = 'UPDATE products SET inventory = ? WHERE product_id = ?'
+            params = (new_inventory, product_id)
+            if self.write_behind:
+                self.write_behind.enqueue(('products.inventory', product_id), sql, params)
+            else:
+                conn = self.conn
+                conn.execute(sql, params)
+                conn.commit()
 
             # Update in-memory product list
-            for product in self.products:
-                if product.product_id == product_id:
-                    product.inventory = new_inventory
-                    break
+            product = self.products_by_id.get(product_id)
+            if product:
+                product.inventory = new_inventory
 
             logging.info(f"Updated inventory for Product ID {product_id} to {new_inventory}.")
             return True
@@ -263,12 +1334,307 @@ class DataStore:
             logging.error(f"Failed to update inventory for Product ID {product_id}: {e}")
             return False
 
+    def flush(self):
+        """
+        Write any queued write-behind updates to the database immediately.
+        """
+        if self.write_behind:
+            self.write_behind.flush()
+
+    def import_products(self, path, chunk_size=5000):
+        """
+        Bulk load a product catalog from a CSV or JSONL file.
+        The file is streamed in chunks, and each chunk is written with executemany in its own
+        transaction. Rows with a sku upsert on sku; rows without one upsert on name. A product
+        listed under a new sku keeps its row and takes the new sku.
+        
+        Rows that cannot be read or that contradict the catalog (a sku and a name belonging
+        to two different products) are skipped and logged, and the rest of the file is imported.
+        
+        Expected fields: name, price, inventory, and optionally sku.
+        
+        Parameters:
+            path (str): Path to the catalog file.
+            chunk_size (int, optional): Rows per transaction.
+            
+        Returns:
+            dict: 'rows', 'skipped', 'seconds' and 'rows_per_second' for the import.
+        """
+        start = time.perf_counter()
+        rows = 0
+        skipped = 0
+        conn = self.conn
+        for chunk_start, chunk in enumerate(chunked(iter_records(path), chunk_size)):
+            parsed = []
+            for offset, record in enumerate(chunk):
+                try:
+                    sku = (record.get('sku') or '').strip() or None
+                    parsed.append((sku, record['name'].strip(), float(record['price']), int(record.get('inventory') or 0)))
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    logging.warning(f"Skipping product record {chunk_start * chunk_size + offset + 1}: {e}")
+                    skipped += 1
+
+            try:
+                with conn:
+                    self.upsert_products(conn, parsed)
+            except sqlite3.IntegrityError:
+                # Replay the chunk a row at a time so only the conflicting rows are lost
+                for sku, name, price, inventory in parsed:
+                    try:
+                        with conn:
+                            self.upsert_products(conn, [(sku, name, price, inventory)])
+                    except sqlite3.IntegrityError as e:
+                        logging.warning(f"Skipping product {name!r} (sku {sku}): {e}")
+                        skipped += 1
+            rows += len(chunk)
+
+        self.refresh_from_database(force=True)
+        return self.import_report('products', rows - skipped, start, skipped)
+
+    def upsert_products(self, conn, rows):
+        """
+        Insert or update catalog rows. The caller owns the transaction.
+        
+        Parameters:
+            conn (sqlite3.Connection): The connection to write with.
+            rows (list of tuple): (sku, name, price, inventory) tuples; sku may be None.
+        """
+        with_sku = [row for row in rows if row[0]]
+        without_sku = [row[1:] for row in rows if not row[0]]
+        # A product listed under a sku no other product holds takes that sku, so a changed
+        # sku updates the existing row instead of colliding with it on name
+        conn.executemany('''
+            UPDATE products SET sku = ?1
+            WHERE name = ?2 AND sku IS NOT ?1
+              AND NOT EXISTS (SELECT 1 FROM products WHERE sku = ?1)
+        ''', [(sku, name) for sku, name, price, inventory in with_sku])
+        conn.executemany('''
+            INSERT INTO products (sku, name, price, inventory) VALUES (?, ?, ?, ?)
+            ON CONFLICT(sku) WHERE sku IS NOT NULL DO UPDATE SET
+                name = excluded.name, price = excluded.price, inventory = excluded.inventory
+        ''', with_sku)
+        conn.executemany('''
+            INSERT INTO products (name, price, inventory) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                price = excluded.price, inventory = excluded.inventory
+        ''', without_sku)
+
+    def import_orders(self, path, chunk_size=2000):
+        """
+        Bulk load historical orders from a CSV or JSONL file.
+        Orders are streamed in chunks; each chunk reserves a contiguous block of order IDs from the
+        allocator and writes its orders and line items with executemany in one transaction. Inventory is not
+        changed, since the orders are historical. The external order IDs of each chunk are reserved in the
+        external_orders sequence before the chunk is written, and orders whose external_order_id is already
+        in use are skipped.
+        
+        JSONL lines look like {"user", "status", "external_order_id", "created_at", "items": [...]}.
+        CSV rows are line items grouped by an order_ref column. Each line item names its product by
+        product_id, sku or name, and has a quantity and optional unit_price (defaults to the current price).
+        
+        Parameters:
+            path (str): Path to the orders file.
+            chunk_size (int, optional): Orders per transaction.
+            
+        Returns:
+            dict: 'rows', 'skipped', 'seconds' and 'rows_per_second' for the import, counting orders.
+        """
+        start = time.perf_counter()
+        rows = 0
+        skipped = 0
+        conn = self.conn
+
+        # Resolve product references once for the whole file
+        products_by_key = {}
+        prices = {}
+        for product_id, sku, name, price in conn.execute('SELECT product_id, sku, name, price FROM products'):
+            products_by_key[str(product_id)] = product_id
+            products_by_key[name] = product_id
+            if sku:
+                products_by_key[sku] = product_id
+            prices[product_id] = price
+
+        # External IDs already taken, hot or archived, read once for the whole file
+        used_external_order_ids = {row[0] for row in conn.execute('''
+            SELECT external_order_id FROM orders WHERE external_order_id IS NOT NULL
+            UNION ALL
+            SELECT external_order_id FROM archive.orders WHERE external_order_id IS NOT NULL
+        ''')}
+
+        for chunk in chunked(iter_order_records(path), chunk_size):
+            order_ids = self.order_ids.reserve(len(chunk))
+            order_rows = []
+            item_rows = []
+            max_external_order_id = None
+            for order_id, record in zip(order_ids, chunk):
+                external_order_id = record.get('external_order_id')
+                external_order_id = int(external_order_id) if external_order_id not in (None, '') else None
+                if external_order_id is not None:
+                    if external_order_id in used_external_order_ids:
+                        logging.warning(f"Skipping order with external_order_id {external_order_id}: already in use")
+                        skipped += 1
+                        continue
+                    used_external_order_ids.add(external_order_id)
+                    max_external_order_id = max(max_external_order_id or 0, external_order_id)
+                total_price = 0.0
+                for item in record.get('items', []):
+                    key = str(item.get('product_id') or item.get('sku') or item.get('name') or '').strip()
+                    product_id = products_by_key.get(key)
+                    if product_id is None:
+                        logging.warning(f"Skipping line for unknown product '{key}'")
+                        continue
+                    quantity = int(item['quantity'])
+                    unit_price = float(item.get('unit_price') or prices[product_id])
+                    total_price += quantity * unit_price
+                    item_rows.append((order_id, product_id, quantity, unit_price))
+                order_rows.append((
+                    order_id,
+                    record['user'],
+                    total_price,
+                    OrderStatus(record.get('status') or OrderStatus.DELIVERED.value).value,
+                    external_order_id,
+                    parse_timestamp(record.get('created_at')),
+                ))
+
+            # Reserve the chunk's external IDs before writing them, so no ID that reaches the table
+            # is ever handed out, whichever chunk fails. The allocator commits on its own
+            # connection, so this cannot run inside the chunk's write transaction.
+            if max_external_order_id is not None:
+                self.external_order_ids.advance_past(max_external_order_id)
+
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                # Orders first so the rollup triggers see each line's order
+                cursor.executemany('''
+                    INSERT INTO orders (order_id, user, total_price, status, external_order_id, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', order_rows)
+                cursor.executemany('''
+                    INSERT INTO order_items (order_id, product_id, quantity, unit_price)
+                    VALUES (?, ?, ?, ?)
+                ''', item_rows)
+                if order_rows:
+                    self.index_orders_for_search(cursor, order_rows[0][0], order_rows[-1][0])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            rows += len(order_rows)
+
+        self.refresh_from_database(force=True)
+        return self.import_report('orders', rows, start, skipped)
+
+    def import_report(self, kind, rows, start, skipped=0):
+        """
+        Build and log the throughput report for a bulk import.
+        
+        Parameters:
+            kind (str): What was imported, for the log message.
+            rows (int): The number of records imported.
+            start (float): The time.perf_counter() value when the import began.
+            skipped (int, optional): The number of records skipped as invalid.
+            
+        Returns:
+            dict: 'rows', 'skipped', 'seconds' and 'rows_per_second'.
+        """
+        seconds = time.perf_counter() - start
+        rows_per_second = rows / seconds if seconds > 0 else float(rows)
+        logging.info(f"Imported {rows} {kind} in {seconds:.2f}s ({rows_per_second:.0f} rows/s), skipped {skipped}.")
+        return {'rows': rows, 'skipped': skipped, 'seconds': seconds, 'rows_per_second': rows_per_second}
+
+    def iter_order_lines(self, user=None, status=None, start=None, end=None, batch_size=1000):
+        """
+        Stream order lines from the archive and then the hot tables, each in order_id order,
+        without loading the whole table.
+        Rows are pulled from the cursor with fetchmany, so memory stays flat regardless of size.
+        Orders with no line items yield one row with empty product fields.
+        
+        Parameters:
+            user (str, optional): Only include orders placed by this username.
+            status (OrderStatus or str, optional): Only include orders with this status.
+            start (float or str, optional): Only include orders created at or after this
+                Unix timestamp or ISO 8601 date.
+            end (float or str, optional): Only include orders created before this time.
+            batch_size (int, optional): Rows fetched per round trip.
+            
+        Yields:
+            dict: One record per order line, keyed by ORDER_LINE_FIELDS.
+        """
+        conditions = []
+        params = []
+        if user is not None:
+            conditions.append('o.user = ?')
+            params.append(user)
+        if status is not None:
+            conditions.append('o.status = ?')
+            params.append(OrderStatus(status).value)
+        if start not in (None, ''):
+            conditions.append('o.created_at >= ?')
+            params.append(parse_timestamp(start))
+        if end not in (None, ''):
+            conditions.append('o.created_at < ?')
+            params.append(parse_timestamp(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        # Archived (older) orders first, then the hot table
+        for schema in ('archive', 'main'):
+            cursor = self.pool.get_connection().cursor()
+            cursor.execute(f'''
+                SELECT o.order_id, o.external_order_id, o.user, o.status, o.created_at,
+                       oi.product_id, p.name, oi.quantity, oi.unit_price
+                FROM {schema}.orders o
+                LEFT JOIN {schema}.order_items oi ON oi.order_id = o.order_id
+                LEFT JOIN main.products p ON p.product_id = oi.product_id
+                {where}
+                ORDER BY o.order_id
+            ''', params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(zip(ORDER_LINE_FIELDS, row))
+            finally:
+                cursor.close()
+
+    def export_orders(self, path, fmt=None, user=None, status=None, start=None, end=None):
+        """
+        Export order history to a CSV or JSONL file, writing rows as they are read.
+        CSV files get one row per order line; JSONL files get one order per line with its items.
+        
+        Parameters:
+            path (str): Destination file path.
+            fmt (str, optional): 'csv' or 'jsonl'; defaults to the file extension.
+            user (str, optional): Only export orders placed by this username.
+            status (OrderStatus or str, optional): Only export orders with this status.
+            start (float or str, optional): Only export orders created at or after this time.
+            end (float or str, optional): Only export orders created before this time.
+            
+        Returns:
+            int: The number of rows (CSV) or orders (JSONL) written.
+        """
+        fmt = export_format(path, fmt)
+        lines = self.iter_order_lines(user=user, status=status, start=start, end=end)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            if fmt == 'csv':
+                count = write_csv(lines, f)
+            else:
+                count = write_jsonl(lines, f)
+        logging.info(f"Exported {count} {'rows' if fmt == 'csv' else 'orders'} to {path}.")
+        return count
+
     def close_connection(self):
         """
-        Close the database connection when the application is shutting down.
+        Close all pooled database connections when the application is shutting down.
         """
         try:
-            self.conn.close()
-            logging.info("Database connection closed.")
+            if self.write_behind:
+                self.write_behind.stop()
+            self.order_ids.close()
+            self.external_order_ids.close()
+            self.pool.close_all()
+            logging.info("Database connections closed.")
         except sqlite3.Error as e:
             logging.error(f"Failed to close database connection: {e}")
@@ -0,0 +1,77 @@
+# models/identity_map.py
+
+import threading
+
+class OrderIdentityMap:
+    def __init__(self):
+        """
+        Keep exactly one live Order instance per order_id.
+        DataStore, User and MockAPIClient all resolve orders through this map, so a
+        change made to an order through any of them is seen by the others.
+        """
+        self._by_id = {}            # order_id -> Order
+        self._by_external_id = {}   # external_order_id -> Order
+        self._lock = threading.Lock()
+
+    def register(self, order):
+        """
+        Add an order to the map, or return the instance already registered for its order_id.
+
+        Parameters:
+            order (Order): The order to register.
+
+        Returns:
+            Order: The canonical instance for this order_id.
+        """
+        with self._lock:
+            existing = self._by_id.get(order.order_id)
+            if existing is not None:
+                order = existing
+            else:
+                self._by_id[order.order_id] = order
+            if order.external_order_id is not None:
+                self._by_external_id[order.external_order_id] = order
+            return order
+
+    def remove(self, order):
+        """
+        Drop an order from the map, e.g. once it has been archived.
+
+        Parameters:
+            order (Order): The order to remove.
+        """
+        with self._lock:
+            if self._by_id.get(order.order_id) is order:
+                del self._by_id[order.order_id]
+            if order.external_order_id is not None and self._by_external_id.get(order.external_order_id) is order:
+                del self._by_external_id[order.external_order_id]
+
+    def get(self, order_id):
+        """
+        Retrieve the canonical order for an internal order ID.
+
+        Parameters:
+            order_id (int): The internal order ID.
+
+        Returns:
+            The matching Order instance or None if not registered.
+        """
+        return self._by_id.get(order_id)
+
+    def get_by_external_id(self, external_order_id):
+        """
+        Retrieve the canonical order for an external order ID.
+
+        Parameters:
+            external_order_id (int): The external order ID.
+
+        Returns:
+            The matching Order instance or None if not registered.
+        """
+        return self._by_external_id.get(external_order_id)
+
+    def __contains__(self, order_id):
+        return order_id in self._by_id
+
+    def __len__(self):
+        return len(self._by_id)
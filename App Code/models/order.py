@@ -3,29 +3,54 @@
 from models.order_status import OrderStatus
 
 class Order:
-    def __init__(self, user, items):
+    __slots__ = ('user', '_items', '_items_loader', 'order_id', 'status', 'external_order_id', 'created_at')
+
+    def __init__(self, user, items=None, items_loader=None):
         """
         Represent a single order placed by a user.
         
         Parameters:
             user (User): The user who placed the order.
-            items (list of OrderItem): The items included in this order.
+            items (list of OrderItem, optional): The items included in this order.
+            items_loader (callable, optional): Called with the order_id to load the items
+                the first time they are accessed, when items is not given. A single loader
+                is shared by many orders, so no per-order closure is kept.
         """
         self.user = user
-        self.items = items
-        self.order_id = self.generate_order_id()
+        self._items = items
+        self._items_loader = items_loader
+        self.order_id = None  # Assigned by DataStore when the order is saved
         self.status = OrderStatus.PROCESSING
         self.external_order_id = None  # Set when placed via external API
+        self.created_at = None  # Unix timestamp, set when saved to the database
+
+    @property
+    def items(self):
+        """
+        The items included in this order, loaded on first access if needed.
+        
+        Returns:
+            list of OrderItem: The order's items.
+        """
+        if self._items is None:
+            self._items = self._items_loader(self.order_id) if self._items_loader else []
+            self._items_loader = None
+        return self._items
+
+    @items.setter
+    def items(self, items):
+        self._items = items
+        self._items_loader = None
 
-    def generate_order_id(self):
+    @property
+    def items_loader(self):
         """
-        Generate a random internal order ID.
+        The loader that will fetch this order's items, or None once they are loaded.
         
         Returns:
-            int: A random integer used as the internal order ID.
+            callable: The pending items loader, or None.
         """
-        import random
-        return random.randint(1000, 9999)
+        return self._items_loader if self._items is None else None
 
     def update_status(self, new_status):
         """
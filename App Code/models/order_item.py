@@ -1,25 +1,30 @@
 # models/order_item.py
 
 class OrderItem:
-    def __init__(self, product, quantity):
+    __slots__ = ('product', 'quantity', 'unit_price')
+
+    def __init__(self, product, quantity, unit_price=None):
         """
-        Represent a single item in an order, with a product and a quantity.
+        Represent a single item in an order, with a product, a quantity and the unit price charged.
         
         Parameters:
             product (Product): The product associated with this order item.
             quantity (int): The quantity of the product in this order item.
+            unit_price (float, optional): The price charged per unit. Defaults to the product's
+                current price; stored orders pass the price they were placed at.
         """
         self.product = product
         self.quantity = quantity
+        self.unit_price = product.price if unit_price is None else unit_price
 
     def get_total_price(self):
         """
-        Calculate the total price for this order item: product price * quantity.
+        Calculate the total price for this order item: unit price * quantity.
         
         Returns:
             float: The total price for this item.
         """
-        return self.product.price * self.quantity
+        return self.unit_price * self.quantity
 
     def __str__(self):
         """
@@ -0,0 +1,230 @@
+# models/order_snapshot.py
+
+import time
+import numpy as np
+from models.order_status import OrderStatus
+
+# Status codes are positions in the OrderStatus enum
+STATUSES = list(OrderStatus)
+STATUS_CODES = {status.value: code for code, status in enumerate(STATUSES)}
+
+# Columns as read from SQLite; the day column is derived afterwards
+READ_DTYPE = np.dtype([
+    ('order_id', 'i8'),
+    ('user_code', 'i4'),
+    ('status_code', 'i1'),
+    ('created_at', 'f8'),   # NaN if unknown
+    ('product_id', 'i8'),
+    ('quantity', 'i4'),
+    ('unit_price', 'f8'),
+])
+
+LINE_DTYPE = np.dtype([
+    ('order_id', 'i8'),
+    ('user_code', 'i4'),
+    ('status_code', 'i1'),
+    ('created_at', 'f8'),
+    ('day', 'i4'),          # Local calendar day as days since 1970-01-01, or -1 if unknown
+    ('product_id', 'i8'),
+    ('quantity', 'i4'),
+    ('unit_price', 'f8'),
+])
+
+def local_days(timestamps):
+    """
+    Convert Unix timestamps to local calendar days, vectorized.
+    The UTC offset is looked up once per distinct hour, which keeps DST changes exact
+    without a Python call per element.
+
+    Parameters:
+        timestamps (numpy.ndarray): Unix timestamps; NaN for unknown.
+
+    Returns:
+        numpy.ndarray: Days since 1970-01-01 in local time, or -1 where the timestamp is unknown.
+    """
+    days = np.full(len(timestamps), -1, dtype='i4')
+    known = ~np.isnan(timestamps)
+    if not known.any():
+        return days
+    hours = (timestamps[known] // 3600).astype('i8')
+    unique_hours, inverse = np.unique(hours, return_inverse=True)
+    offsets = np.array([time.localtime(int(hour) * 3600).tm_gmtoff for hour in unique_hours], dtype='f8')
+    days[known] = ((timestamps[known] + offsets[inverse]) // 86400).astype('i4')
+    return days
+
+class OrderSnapshot:
+    def __init__(self, lines, users):
+        """
+        A columnar, read-only copy of order lines held in NumPy arrays.
+        One element per order line; order-level fields are repeated on each line.
+
+        Parameters:
+            lines (numpy.ndarray): Structured array with LINE_DTYPE.
+            users (list of str): Usernames indexed by user_code.
+        """
+        self.users = users
+        self.order_id = lines['order_id']
+        self.user_code = lines['user_code']
+        self.status_code = lines['status_code']
+        self.created_at = lines['created_at']
+        self.day = lines['day']
+        self.product_id = lines['product_id']
+        self.quantity = lines['quantity']
+        self.unit_price = lines['unit_price']
+        self.revenue = self.quantity * self.unit_price
+
+    @classmethod
+    def from_connection(cls, conn, include_archive=True):
+        """
+        Build a snapshot by reading order lines straight from SQLite into NumPy arrays,
+        without creating Order or OrderItem objects. User and status codes are resolved
+        in SQL, so cursor rows feed np.fromiter directly. The snapshot is read in its own
+        transaction, so the connection must not have one open.
+
+        Parameters:
+            conn (sqlite3.Connection): A connection with the orders, order_items and
+                (if include_archive) attached archive tables, and no open transaction.
+            include_archive (bool, optional): Also read archived orders.
+
+        Returns:
+            OrderSnapshot: The snapshot.
+        """
+        if conn.in_transaction:
+            # Committing or rolling back here would end the caller's unfinished work
+            raise ValueError("Cannot read an order snapshot inside an open transaction")
+        schemas = ['main', 'archive'] if include_archive else ['main']
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS snapshot_users (user_code INTEGER PRIMARY KEY, user TEXT UNIQUE)')
+        # One read transaction, so the line counts and the rows come from the same database state
+        # even while write-behind or archiving commits on other connections
+        conn.execute('BEGIN')
+        try:
+            conn.execute('DELETE FROM temp.snapshot_users')
+            conn.execute(
+                'INSERT INTO temp.snapshot_users (user_code, user) SELECT ROW_NUMBER() OVER (ORDER BY user) - 1, user FROM ('
+                + ' UNION '.join(f'SELECT COALESCE(user, \'\') AS user FROM {schema}.orders' for schema in schemas)
+                + ')'
+            )
+            users = [row[0] for row in conn.execute('SELECT user FROM temp.snapshot_users ORDER BY user_code')]
+            status_case = ' '.join(f"WHEN '{value}' THEN {code}" for value, code in STATUS_CODES.items())
+
+            parts = []
+            for schema in schemas:
+                joins = f'''
+                    FROM {schema}.orders o
+                    JOIN {schema}.order_items oi ON oi.order_id = o.order_id
+                    JOIN temp.snapshot_users u ON u.user = COALESCE(o.user, '')
+                '''
+                # Counted over the same joins, so line items without an order are excluded from both
+                count = conn.execute(f'SELECT COUNT(*) {joins}').fetchone()[0]
+                cursor = conn.execute(f'''
+                    SELECT o.order_id, u.user_code, CASE o.status {status_case} ELSE -1 END,
+                           COALESCE(o.created_at, 'NaN'), oi.product_id, oi.quantity, oi.unit_price
+                    {joins}
+                ''')
+                parts.append(np.fromiter(cursor, dtype=READ_DTYPE, count=count))
+            rows = np.concatenate(parts)
+            conn.execute('DELETE FROM temp.snapshot_users')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+        lines = np.empty(len(rows), dtype=LINE_DTYPE)
+        for name in READ_DTYPE.names:
+            lines[name] = rows[name]
+        lines['day'] = local_days(rows['created_at'])
+        return cls(lines, users)
+
+    def __len__(self):
+        return len(self.order_id)
+
+    def mask(self, exclude_cancelled=True, user=None):
+        """
+        Build a boolean line filter.
+
+        Parameters:
+            exclude_cancelled (bool, optional): Drop lines of cancelled orders.
+            user (str, optional): Keep only lines of this user's orders.
+
+        Returns:
+            numpy.ndarray: Boolean array, one entry per line.
+        """
+        selected = np.ones(len(self), dtype=bool)
+        if exclude_cancelled:
+            selected &= self.status_code != STATUS_CODES[OrderStatus.CANCELLED.value]
+        if user is not None:
+            if user not in self.users:
+                return np.zeros(len(self), dtype=bool)
+            selected &= self.user_code == self.users.index(user)
+        return selected
+
+    def group_sum(self, keys, values, selected):
+        """
+        Sum values grouped by key over the selected lines.
+
+        Parameters:
+            keys (numpy.ndarray): Group key per line.
+            values (numpy.ndarray): Value per line.
+            selected (numpy.ndarray): Boolean line filter.
+
+        Returns:
+            tuple: (unique keys, sums) as NumPy arrays.
+        """
+        unique_keys, inverse = np.unique(keys[selected], return_inverse=True)
+        sums = np.bincount(inverse, weights=values[selected], minlength=len(unique_keys))
+        return unique_keys, sums
+
+    def revenue_by_product(self, exclude_cancelled=True, user=None):
+        """
+        Total revenue (quantity * unit price) per product.
+
+        Parameters:
+            exclude_cancelled (bool, optional): Leave out cancelled orders.
+            user (str, optional): Only include this user's orders.
+
+        Returns:
+            tuple: (product_id array, revenue array).
+        """
+        return self.group_sum(self.product_id, self.revenue, self.mask(exclude_cancelled, user))
+
+    def units_by_product(self, exclude_cancelled=True, user=None):
+        """
+        Total units ordered per product.
+
+        Parameters:
+            exclude_cancelled (bool, optional): Leave out cancelled orders.
+            user (str, optional): Only include this user's orders.
+
+        Returns:
+            tuple: (product_id array, units array).
+        """
+        return self.group_sum(self.product_id, self.quantity, self.mask(exclude_cancelled, user))
+
+    def revenue_by_day(self, exclude_cancelled=True, user=None):
+        """
+        Total revenue per local calendar day.
+        Lines of orders without a recorded created_at are left out.
+
+        Parameters:
+            exclude_cancelled (bool, optional): Leave out cancelled orders.
+            user (str, optional): Only include this user's orders.
+
+        Returns:
+            tuple: (numpy.datetime64[D] day array, revenue array).
+        """
+        selected = self.mask(exclude_cancelled, user) & (self.day >= 0)
+        days, sums = self.group_sum(self.day, self.revenue, selected)
+        return days.astype('datetime64[D]'), sums
+
+    def revenue_by_status(self, user=None):
+        """
+        Total revenue per order status.
+
+        Parameters:
+            user (str, optional): Only include this user's orders.
+
+        Returns:
+            dict: OrderStatus value -> revenue, including cancelled orders.
+        """
+        codes, sums = self.group_sum(self.status_code, self.revenue, self.mask(False, user))
+        return {STATUSES[code].value: total for code, total in zip(codes, sums) if code >= 0}
@@ -1,6 +1,8 @@
 # models/product.py
 
 class Product:
+    __slots__ = ('product_id', 'name', 'price', 'inventory')
+
     def __init__(self, product_id, name, price, inventory=0):
         """
         Represent a single product with ID, name, price, and available inventory.
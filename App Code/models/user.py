@@ -1,6 +1,8 @@
 # models/user.py
 
 class User:
+    __slots__ = ('username', 'email', 'order_history')
+
     def __init__(self, username, email=None):
         """
         Represent a user of the system with a username and an optional email.
@@ -0,0 +1,29 @@
+# tests/conftest.py
+
+import os
+import sys
+import pytest
+
+# The application imports its packages relative to the App Code directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.data_store import DataStore
+from models.user import User
+
+@pytest.fixture
+def make_store(tmp_path):
+    """
+    Create DataStores on throwaway database files, closing them after the test.
+    """
+    stores = []
+
+    def make(username="tester", **kwargs):
+        kwargs.setdefault('database', str(tmp_path / 'data_store.db'))
+        kwargs.setdefault('archive_database', str(tmp_path / 'archive.db'))
+        store = DataStore(User(username, None), **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close_connection()
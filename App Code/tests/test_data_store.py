@@ -0,0 +1,191 @@
+# tests/test_data_store.py
+
+import pytest
+from models.order import Order
+from models.order_item import OrderItem
+from models.order_status import OrderStatus
+from models.order_snapshot import OrderSnapshot
+
+def place(store, product_name, quantity=1, status=None):
+    """
+    Place an order for one product through the DataStore.
+    """
+    product = next(p for p in store.products if p.name == product_name)
+    order = Order(store.user, [OrderItem(product, quantity)])
+    assert store.place_order_atomic(order) == []
+    if status is not None:
+        store.update_order_statuses([(order, status)])
+    return order
+
+def test_search_then_load_older_pages_in_archived_order(make_store):
+    store = make_store()
+    fuel = place(store, "Fuel Pump", status=OrderStatus.DELIVERED)
+    place(store, "Battery", status=OrderStatus.DELIVERED)
+    assert store.archive_finished_orders(older_than_days=-1) == 2
+
+    assert [o.order_id for o in store.search_orders('Fuel')] == [fuel.order_id]
+    assert fuel.order_id not in [o.order_id for o in store.user.order_history]
+
+    loaded = store.load_archived_orders()
+    assert fuel.order_id in [o.order_id for o in loaded]
+    assert len(loaded) == 2
+    # The search hit and the paged history share one instance
+    assert store.search_orders('Fuel')[0] is store.get_order_by_id(fuel.order_id)
+    assert store.load_archived_orders() == []
+
+def test_import_products_moves_product_to_changed_sku(make_store, tmp_path):
+    store = make_store()
+    catalog = tmp_path / 'catalog.csv'
+    catalog.write_text("sku,name,price,inventory\nBAT-1,Battery,119.99,50\nPMP-1,Fuel Pump,89.99,60\n")
+    assert store.import_products(str(catalog))['skipped'] == 0
+    battery_id = next(p.product_id for p in store.products if p.name == "Battery")
+
+    # Battery is relisted under a new sku; the last row names Battery's sku with Fuel Pump's name
+    catalog.write_text("sku,name,price,inventory\nBAT-2,Battery,124.99,45\nOIL-1,Oil Filter,9.99,200\n"
+                       "BAT-2,Fuel Pump,1.00,1\nBAD-1,Broken,not a price,1\n")
+    report = store.import_products(str(catalog))
+    assert report['rows'] == 2
+    assert report['skipped'] == 2
+
+    rows = dict((name, (product_id, sku, price)) for product_id, sku, name, price in
+                store.conn.execute('SELECT product_id, sku, name, price FROM products'))
+    assert rows["Battery"] == (battery_id, 'BAT-2', 124.99)
+    assert rows["Oil Filter"][1] == 'OIL-1'
+    assert rows["Fuel Pump"][1:] == ('PMP-1', 89.99)
+    assert "Broken" not in rows
+
+def test_loaded_items_keep_the_price_charged(make_store):
+    store = make_store()
+    order = place(store, "Brake Pads", quantity=2)
+    store.conn.execute("UPDATE products SET price = 31.0 WHERE name = 'Brake Pads'")
+    store.conn.commit()
+
+    reloaded = make_store().get_order_by_id(order.order_id)
+    item = reloaded.items[0]
+    assert item.product.price == 31.0
+    assert item.unit_price == 29.99
+    assert reloaded.get_total_order_price() == 2 * 29.99
+
+def test_history_items_load_in_one_query(make_store):
+    store = make_store()
+    for name in ("Battery", "Muffler", "Radiator"):
+        place(store, name)
+
+    reloaded = make_store()
+    statements = []
+    reloaded.conn.set_trace_callback(statements.append)
+    reloaded.load_items_for_orders(reloaded.user.order_history)
+    reloaded.conn.set_trace_callback(None)
+
+    assert len([s for s in statements if 'order_items' in s]) == 1
+    assert [o.items[0].product.name for o in reloaded.user.order_history] == ["Battery", "Muffler", "Radiator"]
+
+def test_order_snapshot_skips_orphaned_line_items(make_store):
+    store = make_store()
+    place(store, "Battery", quantity=3)
+    # A line item whose order is gone must not break the preallocated read
+    store.conn.execute('INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (999999, 1, 1, 1.0)')
+    store.conn.commit()
+
+    snapshot = store.get_order_snapshot()
+    assert len(snapshot) == 1
+    assert snapshot.quantity.tolist() == [3]
+    assert not store.conn.in_transaction
+
+def test_archive_keeps_orders_of_unknown_age(make_store):
+    store = make_store()
+    legacy = place(store, "Muffler", status=OrderStatus.DELIVERED)
+    place(store, "Battery", status=OrderStatus.DELIVERED)
+    store.conn.execute('UPDATE orders SET created_at = NULL WHERE order_id = ?', (legacy.order_id,))
+    store.conn.commit()
+
+    assert store.archive_finished_orders(older_than_days=-1) == 1
+    assert store.get_order_by_id(legacy.order_id) is legacy
+
+def test_import_orders_reserves_external_ids_of_committed_chunks(make_store, tmp_path):
+    store = make_store()
+    orders = tmp_path / 'orders.jsonl'
+    orders.write_text(
+        '{"user": "tester", "status": "Delivered", "external_order_id": 100700, "items": [{"name": "Battery", "quantity": 1}]}\n'
+        '{"user": "tester", "status": "Bogus", "external_order_id": 100800, "items": [{"name": "Battery", "quantity": 1}]}\n'
+    )
+    with pytest.raises(ValueError):
+        store.import_orders(str(orders), chunk_size=1)
+    assert store.conn.execute('SELECT COUNT(*) FROM orders WHERE external_order_id = 100700').fetchone()[0] == 1
+    assert store.external_order_ids.next_id() > 100700
+
+def test_import_orders_skips_external_ids_in_use(make_store, tmp_path):
+    store = make_store()
+    taken = store.external_order_ids.next_id()
+    order = place(store, "Muffler")
+    store.conn.execute('UPDATE orders SET external_order_id = ? WHERE order_id = ?', (taken, order.order_id))
+    store.conn.commit()
+
+    orders = tmp_path / 'orders.jsonl'
+    orders.write_text(
+        f'{{"user": "tester", "external_order_id": {taken}, "items": [{{"name": "Battery", "quantity": 1}}]}}\n'
+        '{"user": "tester", "external_order_id": 100900, "items": [{"name": "Battery", "quantity": 1}]}\n'
+        '{"user": "tester", "external_order_id": 100900, "items": [{"name": "Battery", "quantity": 1}]}\n'
+    )
+    report = store.import_orders(str(orders))
+    assert (report['rows'], report['skipped']) == (1, 2)
+    assert store.conn.execute('SELECT COUNT(*) FROM orders WHERE external_order_id = ?', (taken,)).fetchone()[0] == 1
+
+def test_refresh_sees_updates_after_the_newest_row_is_archived(make_store):
+    store = make_store()
+    first = place(store, "Battery")
+    newest = place(store, "Muffler", status=OrderStatus.DELIVERED)
+    other = make_store()
+    assert other.get_order_by_id(newest.order_id) is not None
+
+    assert store.archive_finished_orders(older_than_days=-1) == 1
+    store.update_order_statuses([(first, OrderStatus.IN_TRANSIT)])
+
+    assert other.refresh_from_database()
+    assert other.get_order_by_id(first.order_id).status == OrderStatus.IN_TRANSIT
+    # The archived order is dropped from the other instance too
+    assert other.get_order_by_id(newest.order_id) is None
+    assert newest.order_id not in [o.order_id for o in other.user.order_history]
+
+def test_refresh_sees_created_at_and_sku_changes(make_store):
+    store = make_store()
+    order = place(store, "Battery")
+    other = make_store()
+
+    store.conn.execute("UPDATE products SET sku = 'BAT-9' WHERE name = 'Battery'")
+    store.conn.execute('UPDATE orders SET created_at = 0 WHERE order_id = ?', (order.order_id,))
+    store.conn.commit()
+    versions = (other.products_version, other.orders_version)
+    assert other.refresh_from_database()
+    assert other.products_version > versions[0]
+    assert other.orders_version > versions[1]
+    assert other.get_order_by_id(order.order_id).created_at == 0
+
+def test_archive_query_uses_status_index(make_store):
+    store = make_store()
+    plan = store.conn.execute('''
+        EXPLAIN QUERY PLAN SELECT order_id FROM orders
+        WHERE status IN (?, ?) AND created_at IS NOT NULL AND created_at < ?
+    ''', ('Delivered', 'Cancelled', 0)).fetchall()
+    assert any('idx_orders_status_created' in row[-1] for row in plan)
+
+def test_place_order_releases_write_lock_on_any_error(make_store):
+    store = make_store()
+    product = store.products[0]
+    order = Order(store.user, [OrderItem(product, 1)])
+    order.status = None  # Fails with AttributeError inside the transaction
+    with pytest.raises(AttributeError):
+        store.place_order_atomic(order)
+    assert not store.conn.in_transaction
+
+def test_order_snapshot_refuses_to_end_callers_transaction(make_store):
+    store = make_store()
+    place(store, "Battery")
+    store.conn.execute('BEGIN')
+    store.conn.execute("UPDATE products SET price = 1.0 WHERE name = 'Muffler'")
+    with pytest.raises(ValueError):
+        OrderSnapshot.from_connection(store.conn)
+    # The caller's work is still pending and can be rolled back
+    assert store.conn.in_transaction
+    store.conn.rollback()
+    assert store.conn.execute("SELECT price FROM products WHERE name = 'Muffler'").fetchone()[0] == 99.99
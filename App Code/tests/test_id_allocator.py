@@ -0,0 +1,71 @@
+# tests/test_id_allocator.py
+
+import sqlite3
+import pytest
+from utils.id_allocator import IdAllocator
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'ids.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE id_sequences (name TEXT PRIMARY KEY, next_id INTEGER NOT NULL)')
+    conn.execute("INSERT INTO id_sequences (name, next_id) VALUES ('orders', 1)")
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def allocator(database):
+    allocator = IdAllocator(database, 'orders', block_size=100)
+    yield allocator
+    allocator.close()
+
+def test_next_id_counts_up_through_blocks(allocator):
+    assert [allocator.next_id() for _ in range(150)] == list(range(1, 151))
+
+def test_reserve_is_contiguous_and_above_issued_ids(allocator):
+    assert allocator.next_id() == 1
+    reserved = allocator.reserve(10)
+    assert reserved == range(101, 111)
+    assert allocator.next_id() == 111
+
+def test_advance_past_below_block_keeps_it(allocator):
+    issued = [allocator.next_id() for _ in range(5)]
+    allocator.advance_past(3)
+    following = allocator.next_id()
+    assert issued[-1] < following <= 100
+
+def test_advance_past_inside_block_skips_imported_ids(allocator):
+    for _ in range(5):
+        allocator.next_id()
+    allocator.advance_past(50)
+    assert allocator.next_id() > 50
+
+def test_advance_past_above_block_moves_sequence(allocator):
+    allocator.next_id()
+    allocator.advance_past(500)
+    assert allocator.next_id() == 501
+
+def test_advance_past_after_reserve(database):
+    allocator = IdAllocator(database, 'orders', block_size=100)
+    allocator.advance_past(99999)
+    assert allocator.next_id() == 100000
+    allocator.advance_past(100005)
+    allocator.advance_past(100500)
+    assert allocator.next_id() > 100500
+    allocator.close()
+
+def test_sequence_survives_restart(database, allocator):
+    issued = [allocator.next_id() for _ in range(3)]
+    allocator.advance_past(250)
+    allocator.close()
+
+    reopened = IdAllocator(database, 'orders', block_size=100)
+    assert reopened.next_id() > max(issued + [250])
+    reopened.close()
+
+def test_unknown_sequence_raises(database):
+    allocator = IdAllocator(database, 'missing')
+    with pytest.raises(LookupError):
+        allocator.next_id()
+    allocator.close()
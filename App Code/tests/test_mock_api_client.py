@@ -0,0 +1,47 @@
+# tests/test_mock_api_client.py
+
+import pytest
+from api.mock_api_client import MockAPIClient
+from api.geocoding import GeocodeCache, OfflineGeocoder
+from api.routing import RouteCache, StraightLineRouter
+from models.order import Order
+from models.order_item import OrderItem
+from models.order_status import OrderStatus
+
+@pytest.fixture
+def client(make_store, tmp_path):
+    store = make_store()
+    geo_cache = str(tmp_path / 'geo_cache.db')
+    api = MockAPIClient(store, geocoder=GeocodeCache(OfflineGeocoder(), database=geo_cache),
+                        routes=RouteCache(StraightLineRouter(), database=geo_cache))
+    yield api
+    api.shutdown()
+
+def place(api, product_name):
+    """
+    Save an order and hand it to the API, the way the order form does.
+    """
+    store = api.data_store
+    order = Order(store.user, [OrderItem(next(p for p in store.products if p.name == product_name), 1)])
+    order.external_order_id = store.external_order_ids.next_id()
+    assert store.place_order_atomic(order) == []
+    api.place_order(order)
+    return order
+
+def test_get_order_statuses_feeds_batch_persistence(client):
+    kept = place(client, "Battery")
+    cancelled = place(client, "Muffler")
+    assert client.cancel_order(cancelled.external_order_id)
+
+    statuses = client.get_order_statuses([kept.external_order_id, cancelled.external_order_id, 1])
+    assert set(statuses) == {kept.external_order_id, cancelled.external_order_id, 1}
+    assert statuses[kept.external_order_id][0] == OrderStatus.PROCESSING
+    assert statuses[cancelled.external_order_id][0] == OrderStatus.CANCELLED
+    assert statuses[1][0] is None
+
+    store = client.data_store
+    changed = store.update_order_statuses([(kept, statuses[kept.external_order_id][0]),
+                                           (cancelled, statuses[cancelled.external_order_id][0])])
+    assert changed == [cancelled]
+    row = store.conn.execute('SELECT status FROM orders WHERE order_id = ?', (cancelled.order_id,)).fetchone()
+    assert row[0] == OrderStatus.CANCELLED.value
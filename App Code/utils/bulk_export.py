@@ -0,0 +1,75 @@
+# utils/bulk_export.py
+
+import csv
+import json
+import os
+
+ORDER_LINE_FIELDS = [
+    'order_id', 'external_order_id', 'user', 'status', 'created_at',
+    'product_id', 'product_name', 'quantity', 'unit_price',
+]
+
+def export_format(path, fmt=None):
+    """
+    Work out the export format from an explicit value or the file extension.
+
+    Parameters:
+        path (str): The destination path.
+        fmt (str, optional): 'csv' or 'jsonl'.
+
+    Returns:
+        str: 'csv' or 'jsonl'.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.')).lower()
+    if fmt == 'ndjson':
+        fmt = 'jsonl'
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return fmt
+
+def write_csv(lines, f):
+    """
+    Write order lines to a CSV file as they arrive, one row per line item.
+
+    Parameters:
+        lines (iterable of dict): Order line records with ORDER_LINE_FIELDS keys.
+        f (file): A text file opened for writing.
+
+    Returns:
+        int: The number of rows written.
+    """
+    writer = csv.DictWriter(f, fieldnames=ORDER_LINE_FIELDS)
+    writer.writeheader()
+    count = 0
+    for line in lines:
+        writer.writerow(line)
+        count += 1
+    return count
+
+def write_jsonl(lines, f):
+    """
+    Write order lines to a JSONL file as they arrive, one order per line with its items.
+    Lines must be grouped by order_id, as they are when read in order_id order.
+
+    Parameters:
+        lines (iterable of dict): Order line records with ORDER_LINE_FIELDS keys.
+        f (file): A text file opened for writing.
+
+    Returns:
+        int: The number of orders written.
+    """
+    count = 0
+    order = None
+    for line in lines:
+        if order is None or line['order_id'] != order['order_id']:
+            if order is not None:
+                f.write(json.dumps(order) + '\n')
+                count += 1
+            order = {key: line[key] for key in ORDER_LINE_FIELDS[:5]}
+            order['items'] = []
+        if line['product_id'] is not None:
+            order['items'].append({key: line[key] for key in ORDER_LINE_FIELDS[5:]})
+    if order is not None:
+        f.write(json.dumps(order) + '\n')
+        count += 1
+    return count
@@ -0,0 +1,100 @@
+# utils/bulk_import.py
+
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import islice
+
+def iter_records(path):
+    """
+    Stream records from a CSV (with a header row) or JSONL file one at a time.
+
+    Parameters:
+        path (str): Path to a .csv, .jsonl or .ndjson file.
+
+    Yields:
+        dict: One record per CSV row or JSON line.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8') as f:
+        if extension == '.csv':
+            yield from csv.DictReader(f)
+        elif extension in ('.jsonl', '.ndjson'):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported import file type: {path}")
+
+def iter_order_records(path):
+    """
+    Stream historical orders from a CSV or JSONL file one order at a time.
+
+    JSONL files hold one order per line with an "items" list. CSV files hold one line
+    item per row; consecutive rows sharing an order_ref column make up one order, with
+    the order-level columns (user, status, external_order_id, created_at) read from the first row.
+
+    Parameters:
+        path (str): Path to a .csv, .jsonl or .ndjson file.
+
+    Yields:
+        dict: An order record with an "items" list.
+    """
+    if os.path.splitext(path)[1].lower() != '.csv':
+        yield from iter_records(path)
+        return
+
+    current_ref = None
+    order = None
+    for row in iter_records(path):
+        if order is None or row.get('order_ref') != current_ref:
+            if order is not None:
+                yield order
+            current_ref = row.get('order_ref')
+            order = {
+                'user': row.get('user'),
+                'status': row.get('status'),
+                'external_order_id': row.get('external_order_id'),
+                'created_at': row.get('created_at'),
+                'items': [],
+            }
+        order['items'].append(row)
+    if order is not None:
+        yield order
+
+def chunked(iterable, size):
+    """
+    Split an iterable into lists of at most size elements without materializing it.
+
+    Parameters:
+        iterable: The items to split.
+        size (int): The maximum chunk length.
+
+    Yields:
+        list: The next chunk.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def parse_timestamp(value):
+    """
+    Convert a Unix timestamp or ISO 8601 string to a Unix timestamp.
+
+    Parameters:
+        value: A number, numeric string, ISO 8601 string, or empty value.
+
+    Returns:
+        float: The Unix timestamp, or None if value is empty.
+    """
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value)).timestamp()
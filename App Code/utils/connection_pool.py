@@ -0,0 +1,92 @@
+# utils/connection_pool.py
+
+import sqlite3
+import threading
+import logging
+
+class ConnectionPool:
+    def __init__(self, database, mmap_size=256 * 1024 * 1024, cache_size_kib=64 * 1024,
+                 statement_cache_size=256, busy_timeout=5.0, attachments=None):
+        """
+        Hand out one SQLite connection per thread for a single database file.
+        Each connection runs in WAL mode so readers never block on a writer.
+
+        Parameters:
+            database (str): Path to the SQLite database file.
+            mmap_size (int): Bytes of the database file to memory-map (PRAGMA mmap_size).
+            cache_size_kib (int): Page cache size in KiB (PRAGMA cache_size).
+            statement_cache_size (int): Number of prepared statements kept per connection.
+            busy_timeout (float): Seconds to wait on a locked database before failing.
+            attachments (dict, optional): Schema name -> database path to ATTACH on every connection.
+        """
+        self.database = database
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout = busy_timeout
+        self.attachments = attachments or {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # thread ident -> (Thread, Connection)
+
+    def get_connection(self):
+        """
+        Return the calling thread's connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: A connection owned by the current thread.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.conn = conn
+            with self._lock:
+                self._prune_dead_threads()
+                self._connections[threading.get_ident()] = (threading.current_thread(), conn)
+        return conn
+
+    def _open_connection(self):
+        """
+        Open and tune a new connection.
+
+        Returns:
+            sqlite3.Connection: The configured connection.
+        """
+        # check_same_thread is disabled only so close_all() can run from the shutdown
+        # thread; during normal use every connection stays with the thread that opened it.
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.busy_timeout,
+            cached_statements=self.statement_cache_size,
+            check_same_thread=False
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kib)}')
+        for schema, path in self.attachments.items():
+            conn.execute(f'ATTACH DATABASE ? AS {schema}', (path,))
+            conn.execute(f'PRAGMA {schema}.journal_mode=WAL')
+        return conn
+
+    def _prune_dead_threads(self):
+        """
+        Close connections whose owning thread has exited. Must be called with the lock held.
+        """
+        for ident, (thread, conn) in list(self._connections.items()):
+            if not thread.is_alive():
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logging.error(f"Failed to close pooled connection: {e}")
+                del self._connections[ident]
+
+    def close_all(self):
+        """
+        Close every connection opened by the pool.
+        """
+        with self._lock:
+            for thread, conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,64 @@
+# utils/email_notifier.py
+
+from concurrent.futures import ThreadPoolExecutor
+from models.order_status import OrderStatus
+from utils.email_util import send_email
+from utils.event_bus import ORDER_STATUS_CHANGED, ORDER_LOCATION_CHANGED
+
+class EmailNotifier:
+    def __init__(self, event_bus, workers=2):
+        """
+        Email customers about their orders in response to order events.
+        Only events from the delivery simulator and user actions are mailed; the
+        DataStore's echoes of the same changes are ignored. Emails are sent from a
+        small pool, so publishers never wait on SMTP.
+
+        Parameters:
+            event_bus (EventBus): The bus to subscribe to.
+            workers (int, optional): Threads sending email.
+        """
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='email')
+        event_bus.subscribe(ORDER_STATUS_CHANGED, self.on_order_event)
+        event_bus.subscribe(ORDER_LOCATION_CHANGED, self.on_order_event)
+
+    def on_order_event(self, event):
+        """
+        Pick the email for an order event, if any, and queue it.
+
+        Parameters:
+            event (OrderEvent): The published event.
+        """
+        if event.source == 'data_store' or event.order is None or not event.order.user.email:
+            return
+        external_order_id = event.external_order_id
+        if event.milestone == 'halfway':
+            subject = f"Order {external_order_id} Update"
+            body = f"Your order {external_order_id} is halfway to the destination."
+        elif event.milestone is not None:
+            return
+        elif event.status == OrderStatus.IN_TRANSIT:
+            subject = "Order Status Update"
+            body = f"""
+                Update on your order!
+                Order ID: {event.order.order_id}
+                External Order ID: {external_order_id}
+
+                Current Status: {event.status.value}
+                """
+        elif event.status == OrderStatus.DELIVERED:
+            subject = f"Order {external_order_id} Delivered"
+            body = f"Your order {external_order_id} has been delivered."
+        elif event.status == OrderStatus.CANCELLED:
+            subject = "Order Cancellation"
+            body = f"""
+                    Your order {external_order_id} has been cancelled successfully.
+                    """
+        else:
+            return
+        self.pool.submit(send_email, event.order.user.email, subject, body)
+
+    def shutdown(self):
+        """
+        Stop accepting emails; queued ones are still sent.
+        """
+        self.pool.shutdown(wait=False)
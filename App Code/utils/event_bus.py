@@ -0,0 +1,67 @@
+# utils/event_bus.py
+
+import logging
+import threading
+from collections import namedtuple
+
+# Topics
+ORDER_STATUS_CHANGED = 'order.status_changed'
+ORDER_LOCATION_CHANGED = 'order.location_changed'
+
+# Published on both order topics. source names the publisher: 'api' for the delivery
+# simulator, 'controller' for user actions and 'data_store' for persisted changes.
+OrderEvent = namedtuple('OrderEvent', [
+    'order', 'external_order_id', 'status', 'location', 'latitude', 'longitude', 'milestone', 'source'
+], defaults=(None, None, None, None, None, None))
+
+class EventBus:
+    def __init__(self):
+        """
+        In-process publish/subscribe hub.
+        Subscribers are called on the publisher's thread, in subscription order, so they must
+        return quickly; anything slow or thread-bound (SMTP, Tk widgets) should hand the event
+        to its own thread or event loop.
+        """
+        self._subscribers = {}  # topic -> tuple of callbacks, replaced on every change
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, callback):
+        """
+        Register a callback for a topic.
+
+        Parameters:
+            topic (str): The topic, e.g. ORDER_STATUS_CHANGED.
+            callback (callable): Called with the published event.
+
+        Returns:
+            callable: Call it to unsubscribe.
+        """
+        with self._lock:
+            self._subscribers[topic] = self._subscribers.get(topic, ()) + (callback,)
+        return lambda: self.unsubscribe(topic, callback)
+
+    def unsubscribe(self, topic, callback):
+        """
+        Remove a callback from a topic.
+
+        Parameters:
+            topic (str): The topic.
+            callback (callable): The callback to remove.
+        """
+        with self._lock:
+            self._subscribers[topic] = tuple(cb for cb in self._subscribers.get(topic, ()) if cb != callback)
+
+    def publish(self, topic, event):
+        """
+        Deliver an event to every subscriber of a topic. A failing subscriber is logged
+        and does not stop delivery to the others.
+
+        Parameters:
+            topic (str): The topic.
+            event: The event, usually an OrderEvent.
+        """
+        for callback in self._subscribers.get(topic, ()):
+            try:
+                callback(event)
+            except Exception as e:
+                logging.exception(f"Subscriber {callback!r} failed on {topic}: {e}")
@@ -0,0 +1,89 @@
+# utils/geometry.py
+
+import math
+
+EARTH_RADIUS_M = 6371008.8
+
+def haversine_m(a, b):
+    """
+    Great-circle distance between two points.
+
+    Parameters:
+        a (tuple): (latitude, longitude) of the first point.
+        b (tuple): (latitude, longitude) of the second point.
+
+    Returns:
+        float: The distance in metres.
+    """
+    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(h)))
+
+def project(points):
+    """
+    Project (lat, lon) points onto a flat plane in metres, using an equirectangular
+    projection centred on the first point. Accurate to well under a metre over a city-sized route.
+
+    Parameters:
+        points (list of tuple): (latitude, longitude) pairs.
+
+    Returns:
+        list of tuple: (x, y) in metres.
+    """
+    if not points:
+        return []
+    scale = math.pi / 180 * EARTH_RADIUS_M
+    cos_lat = math.cos(math.radians(points[0][0]))
+    return [(lon * cos_lat * scale, lat * scale) for lat, lon in points]
+
+def segment_distance(px, py, ax, ay, bx, by):
+    """
+    Distance from point P to the segment AB, in the units of the coordinates.
+    """
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+def simplify_route(points, tolerance_m):
+    """
+    Simplify a route with the Douglas-Peucker algorithm, dropping points that lie within
+    tolerance_m metres of the line through the points that are kept. The first and last
+    points are always kept.
+
+    Parameters:
+        points (list of tuple): (latitude, longitude) pairs.
+        tolerance_m (float): Largest allowed deviation in metres; 0 or less keeps every point.
+
+    Returns:
+        list of tuple: The kept (latitude, longitude) pairs, in order.
+    """
+    points = list(points)
+    if tolerance_m <= 0 or len(points) < 3:
+        return points
+    xy = project(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+
+    # Iterative rather than recursive, so long routes cannot hit the recursion limit
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = xy[first]
+        bx, by = xy[last]
+        max_distance = -1.0
+        index = first
+        for i in range(first + 1, last):
+            distance = segment_distance(xy[i][0], xy[i][1], ax, ay, bx, by)
+            if distance > max_distance:
+                max_distance = distance
+                index = i
+        if max_distance > tolerance_m:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
@@ -0,0 +1,127 @@
+# utils/id_allocator.py
+
+import sqlite3
+import threading
+import itertools
+
+class IdAllocator:
+    def __init__(self, database, name, block_size=100, busy_timeout=5.0):
+        """
+        Hand out unique, increasing IDs for one named sequence in the id_sequences table.
+        IDs are reserved from the database a block at a time with a single UPDATE ... RETURNING,
+        so several processes sharing the file never collide. Within the process, IDs come from
+        an itertools.count, whose next() is atomic, so callers only take a lock when a block runs out.
+
+        The allocator uses its own connection so a reservation always commits on its own. Do not
+        call next_id() or reserve() while the calling thread holds a write transaction on the same
+        database; allocate first, then begin the transaction.
+
+        Parameters:
+            database (str): Path to the SQLite database file.
+            name (str): The sequence name, e.g. 'orders'.
+            block_size (int, optional): IDs reserved per round trip.
+            busy_timeout (float, optional): Seconds to wait on a locked database before failing.
+        """
+        self.database = database
+        self.name = name
+        self.block_size = block_size
+        self.busy_timeout = busy_timeout
+        self._block = (itertools.count(), 0)   # (counter, exclusive end); starts exhausted
+        self._refill_lock = threading.Lock()
+        self._conn = None
+
+    def next_id(self):
+        """
+        Return the next ID, reserving a new block from the database if the current one is used up.
+
+        Returns:
+            int: A unique ID, greater than any ID this allocator has returned before.
+        """
+        while True:
+            block = self._block
+            value = next(block[0])
+            if value < block[1]:
+                return value
+            with self._refill_lock:
+                if self._block is block:
+                    start = self._reserve(self.block_size)
+                    self._block = (itertools.count(start), start + self.block_size)
+
+    def reserve(self, count):
+        """
+        Reserve a contiguous run of IDs in one round trip, e.g. for a bulk insert.
+        The current block is dropped, so later next_id() calls return higher IDs.
+
+        Parameters:
+            count (int): How many IDs to reserve.
+
+        Returns:
+            range: The reserved IDs.
+        """
+        if count <= 0:
+            return range(0)
+        with self._refill_lock:
+            start = self._reserve(count)
+            self._block = (itertools.count(), 0)
+        return range(start, start + count)
+
+    def advance_past(self, value):
+        """
+        Make sure no ID at or below value is handed out from now on, e.g. after rows were
+        written with IDs that did not come from this allocator.
+
+        Parameters:
+            value (int): The highest ID already in use.
+        """
+        with self._refill_lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('UPDATE id_sequences SET next_id = MAX(next_id, ?) WHERE name = ?',
+                             (value + 1, self.name))
+            # Taking the next unissued ID costs at most one unused ID, and is the only way to
+            # see how far the shared counter has got
+            block = self._block
+            unissued = next(block[0])
+            if unissued <= value:
+                self._block = (itertools.count(), 0)
+
+    def _reserve(self, count):
+        """
+        Claim count IDs from the database. Must be called with the refill lock held.
+
+        Parameters:
+            count (int): How many IDs to claim.
+
+        Returns:
+            int: The first claimed ID.
+        """
+        conn = self._connection()
+        with conn:
+            rows = conn.execute('''
+                UPDATE id_sequences SET next_id = next_id + ? WHERE name = ? RETURNING next_id
+            ''', (count, self.name)).fetchall()
+        if not rows:
+            raise LookupError(f"Unknown ID sequence: {self.name}")
+        return rows[0][0] - count
+
+    def _connection(self):
+        """
+        Return the allocator's own connection, opening it on first use. Must be called with the refill lock held.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        if self._conn is None:
+            # Shared across threads, but only ever used with the refill lock held
+            self._conn = sqlite3.connect(self.database, timeout=self.busy_timeout, check_same_thread=False)
+        return self._conn
+
+    def close(self):
+        """
+        Close the allocator's connection. IDs left in the current block are not reused.
+        """
+        with self._refill_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._block = (itertools.count(), 0)
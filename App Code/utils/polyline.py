@@ -0,0 +1,61 @@
+# utils/polyline.py
+
+def encode_polyline(points, precision=5):
+    """
+    Encode (lat, lon) points with the Google encoded polyline algorithm.
+    Each coordinate is stored as a rounded delta from the previous point, which makes
+    a road route a few bytes per point.
+
+    Parameters:
+        points (iterable of tuple): (latitude, longitude) pairs.
+        precision (int, optional): Decimal places kept; 5 is about one metre.
+
+    Returns:
+        str: The encoded polyline.
+    """
+    factor = 10 ** precision
+    chunks = []
+    previous_lat = previous_lon = 0
+    for latitude, longitude in points:
+        lat = round(latitude * factor)
+        lon = round(longitude * factor)
+        for delta in (lat - previous_lat, lon - previous_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        previous_lat, previous_lon = lat, lon
+    return ''.join(chunks)
+
+def decode_polyline(encoded, precision=5):
+    """
+    Decode a Google encoded polyline.
+
+    Parameters:
+        encoded (str): The encoded polyline.
+        precision (int, optional): Decimal places used when encoding.
+
+    Yields:
+        tuple: (latitude, longitude) pairs.
+    """
+    factor = 10 ** precision
+    index = 0
+    lat = lon = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = 0
+            result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        yield (lat / factor, lon / factor)
@@ -0,0 +1,137 @@
+# utils/scheduler.py
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+class Scheduler:
+    def __init__(self, name='scheduler', lag_warning=1.0):
+        """
+        Run timed callbacks from a single thread, ordered by a heap of due times.
+        Callbacks run on the scheduler thread, so they must be quick; hand any blocking
+        work (network calls, email) to a worker pool and schedule the next step from there.
+
+        Parameters:
+            name (str, optional): Name of the scheduler thread.
+            lag_warning (float, optional): Log a warning when a callback fires this many
+                seconds after its due time.
+        """
+        self.lag_warning = lag_warning
+        self._heap = []                 # [due, seq, callback, args, cancelled]
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self.fired = 0
+        self.last_lag = 0.0             # Seconds late the most recent callback ran
+        self.max_lag = 0.0              # Worst lateness seen so far
+        self._last_warning = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def call_at(self, when, callback, *args):
+        """
+        Schedule callback(*args) to run at a time.monotonic() timestamp.
+
+        Parameters:
+            when (float): The due time on the time.monotonic() clock.
+            callback (callable): The function to run.
+            *args: Arguments for the callback.
+
+        Returns:
+            list: A handle that can be passed to cancel().
+        """
+        entry = [when, next(self._counter), callback, args, False]
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._condition.notify()
+        return entry
+
+    def call_later(self, delay, callback, *args):
+        """
+        Schedule callback(*args) to run after a delay.
+
+        Parameters:
+            delay (float): Seconds from now.
+            callback (callable): The function to run.
+            *args: Arguments for the callback.
+
+        Returns:
+            list: A handle that can be passed to cancel().
+        """
+        return self.call_at(time.monotonic() + delay, callback, *args)
+
+    def cancel(self, entry):
+        """
+        Cancel a scheduled callback. The entry stays in the heap and is skipped when due.
+
+        Parameters:
+            entry (list): The handle returned by call_at() or call_later().
+        """
+        if entry is not None:
+            entry[4] = True
+
+    def stats(self):
+        """
+        Report how far behind schedule the scheduler is running.
+
+        Returns:
+            dict: 'pending' entries, current 'lag' (seconds the earliest due entry is overdue),
+                'last_lag' and 'max_lag' of callbacks already run, and the number 'fired'.
+        """
+        with self._condition:
+            pending = len(self._heap)
+            earliest = self._heap[0][0] if self._heap else None
+        lag = max(0.0, time.monotonic() - earliest) if earliest is not None else 0.0
+        return {
+            'pending': pending,
+            'lag': lag,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+            'fired': self.fired,
+        }
+
+    def stop(self):
+        """
+        Stop the scheduler thread. Pending callbacks are dropped.
+        """
+        with self._condition:
+            self._stopped = True
+            self._heap.clear()
+            self._condition.notify()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        """
+        Scheduler loop: sleep until the earliest entry is due, then run every due callback.
+        """
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._heap:
+                        delay = self._heap[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._condition.wait(delay)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                when, _, callback, args, cancelled = heapq.heappop(self._heap)
+            if cancelled:
+                continue
+
+            lag = time.monotonic() - when
+            self.last_lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag > self.lag_warning and time.monotonic() - self._last_warning > 10:
+                self._last_warning = time.monotonic()
+                logging.warning(f"Scheduler is running {lag:.2f}s behind ({len(self._heap)} pending).")
+            try:
+                callback(*args)
+            except Exception as e:
+                logging.exception(f"Scheduled callback {callback!r} failed: {e}")
+            self.fired += 1
@@ -0,0 +1,88 @@
+# utils/write_behind.py
+
+import sqlite3
+import threading
+import logging
+
+class WriteBehindQueue:
+    def __init__(self, get_connection, flush_interval=1.0, batch_size=200):
+        """
+        Buffer row updates in memory and write them to SQLite in one transaction per flush.
+        Updates that share a key replace each other, so only the latest value for a row is written.
+
+        Parameters:
+            get_connection (callable): Returns the SQLite connection for the calling thread.
+            flush_interval (float): Seconds between background flushes.
+            batch_size (int): Number of pending rows that triggers an early flush.
+        """
+        self.get_connection = get_connection
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = {}  # key -> (sql, params), in enqueue order
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def enqueue(self, key, sql, params):
+        """
+        Queue a write, replacing any pending write with the same key.
+
+        Parameters:
+            key (hashable): Identifies the row being written, e.g. ('orders.status', order_id).
+            sql (str): The statement to execute.
+            params (tuple): Parameters for the statement.
+        """
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = (sql, params)
+            pending_count = len(self._pending)
+        if pending_count >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Write all pending updates in a single transaction.
+
+        Returns:
+            int: The number of rows written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            conn = self.get_connection()
+            try:
+                with conn:
+                    for sql, params in batch.values():
+                        conn.execute(sql, params)
+            except sqlite3.Error as e:
+                logging.error(f"Write-behind flush of {len(batch)} rows failed: {e}")
+                # Put the batch back unless newer values have arrived in the meantime
+                with self._lock:
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                return 0
+            return len(batch)
+
+    def _run(self):
+        """
+        Background loop that flushes on the interval or when the batch size is reached.
+        """
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stop(self):
+        """
+        Flush remaining updates and stop the background thread.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
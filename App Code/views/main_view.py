@@ -1,17 +1,19 @@
 # views/main_view.py
 
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 from PIL import Image, ImageTk
 from models.order_item import OrderItem
 from models.order import Order
 from models.order_status import OrderStatus
 from utils.email_util import send_email
+from utils.event_bus import ORDER_STATUS_CHANGED, ORDER_LOCATION_CHANGED
 import folium
+import sqlite3
 import threading
 import webbrowser
 import tempfile
-from config import ADMIN_PASSWORD
+from config import ADMIN_PASSWORD, DATABASE_REFRESH_INTERVAL_MS
 import os
 import stripe
 from dotenv import load_dotenv
@@ -102,6 +104,54 @@ class MainView:
         self.status_bar.grid(row=1, column=0, sticky='ew')
         root.rowconfigure(1, weight=0)
 
+        # Order updates are pushed from the event bus instead of polled
+        self.tracked_order = None  # Order shown in the Track Order tab
+        self.controller.event_bus.subscribe(ORDER_STATUS_CHANGED, self.on_order_event)
+        self.controller.event_bus.subscribe(ORDER_LOCATION_CHANGED, self.on_order_event)
+
+        # Periodically pick up changes written by other app instances
+        self.root.after(DATABASE_REFRESH_INTERVAL_MS, self.poll_database_changes)
+
+    def poll_database_changes(self):
+        """
+        Check the database for rows changed by other writers and refresh the affected tabs.
+        Reschedules itself every DATABASE_REFRESH_INTERVAL_MS milliseconds.
+        """
+        try:
+            if self.controller.data_store.refresh_from_database():
+                self.refresh_order_history_tab()
+                if self.admin_authenticated:
+                    self.refresh_inventory_tab()
+        except Exception as e:
+            print(f"Failed to refresh from database: {e}")
+        self.root.after(DATABASE_REFRESH_INTERVAL_MS, self.poll_database_changes)
+
+    def on_order_event(self, event):
+        """
+        Event bus subscriber. Events arrive on the publisher's thread, so they are
+        handed to the Tk event loop before any widget is touched.
+
+        Parameters:
+            event (OrderEvent): The published event.
+        """
+        self.root.after(0, self.apply_order_event, event)
+
+    def apply_order_event(self, event):
+        """
+        Show an order event in the UI: refresh the Track Order tab if it shows the order,
+        and update the order's status cell in the Order History tab. Only that one row is
+        touched, so a busy simulator never makes the Tk thread redraw the whole list.
+        Runs on the Tk thread.
+
+        Parameters:
+            event (OrderEvent): The published event.
+        """
+        if self.tracked_order is not None and self.tracked_order.external_order_id == event.external_order_id:
+            self.show_tracking_info(self.tracked_order)
+        row = self.order_history_rows.get(event.external_order_id)
+        if row is not None and event.status is not None and self.order_history_tree.exists(row):
+            self.order_history_tree.set(row, 'Status', event.status.value)
+
     def setup_tabs(self):
         """
         Set up the main application tabs (Home, Place Order, Order History, Track Order, Inventory).
@@ -507,15 +557,24 @@ class MainView:
             # Payment successful, now place the order
             order_items = [OrderItem(p, q) for p, q in items]
             order = Order(self.controller.user, order_items)
-            external_order_id = self.controller.api_client.place_order(order)
-            order.external_order_id = external_order_id
             order.status = OrderStatus.PROCESSING
-            self.controller.data_store.add_order(order)
 
-            # Update inventory
-            for p, q in items:
-                p.inventory -= q
-                self.controller.data_store.update_inventory(p.product_id, p.inventory)
+            # Save the order and take inventory in one transaction before the API starts
+            # tracking it, so a failed save never leaves a delivery running for a lost order
+            try:
+                external_order_id = self.controller.data_store.external_order_ids.next_id()
+                order.external_order_id = external_order_id
+                failed_items = self.controller.data_store.place_order_atomic(order)
+            except (sqlite3.Error, LookupError) as e:
+                messagebox.showerror("Error", f"Failed to save the order: {e}")
+                self.status_var.set("Order placement failed.")
+                return
+            if failed_items:
+                shortages = "\n".join([f"{item.product.name} (available: {item.product.inventory})" for item in failed_items])
+                messagebox.showwarning("Warning", f"Insufficient inventory for:\n{shortages}")
+                self.status_var.set("Order placement failed.")
+                return
+            self.controller.api_client.place_order(order)
 
             # Send confirmation email
             if self.controller.user.email:
@@ -552,7 +611,18 @@ You will receive updates on your order at this email address.
         self.order_history_tab.rowconfigure(0, weight=1)
         self.order_history_tab.columnconfigure(0, weight=1)
 
-        ttk.Label(main_frame, text="Your Order History:", font=("Helvetica", 18)).grid(row=0, column=0, pady=10, sticky='w')
+        header_frame = ttk.Frame(main_frame)
+        header_frame.grid(row=0, column=0, pady=10, sticky='ew')
+        header_frame.columnconfigure(0, weight=1)
+        ttk.Label(header_frame, text="Your Order History:", font=("Helvetica", 18)).grid(row=0, column=0, sticky='w')
+
+        # Search box, queried as the user types
+        ttk.Label(header_frame, text="Search:").grid(row=0, column=1, padx=(10, 5), sticky='e')
+        self.order_search_var = tk.StringVar()
+        self.order_search_job = None
+        self.order_history_rows = {}  # external_order_id -> Treeview item, for in-place status updates
+        self.order_search_var.trace_add('write', lambda *args: self.schedule_order_search())
+        ttk.Entry(header_frame, textvariable=self.order_search_var, width=30).grid(row=0, column=2, sticky='e')
 
         self.order_history_tree = ttk.Treeview(main_frame, columns=('Order ID', 'External ID', 'Items', 'Total', 'Status'), show='headings')
         self.order_history_tree.heading('Order ID', text='Order ID')
@@ -576,19 +646,106 @@ You will receive updates on your order at this email address.
         self.cancel_order_button = ttk.Button(buttons_frame, text="Cancel Selected Order", command=self.cancel_selected_order)
         self.cancel_order_button.grid(row=0, column=0, padx=5, sticky='w')
 
+        self.export_history_button = ttk.Button(buttons_frame, text="Export History", command=self.export_order_history)
+        self.export_history_button.grid(row=0, column=1, padx=5, sticky='w')
+
+        self.load_older_button = ttk.Button(buttons_frame, text="Load Older Orders", command=self.load_older_orders)
+        self.load_older_button.grid(row=0, column=2, padx=5, sticky='w')
+
         self.refresh_order_history_tab()
 
+    def schedule_order_search(self):
+        """
+        Refresh the Order History tab shortly after the search text stops changing.
+        """
+        if self.order_search_job is not None:
+            self.root.after_cancel(self.order_search_job)
+        self.order_search_job = self.root.after(150, self.refresh_order_history_tab)
+
     def refresh_order_history_tab(self):
         """
         Refresh the Order History tab to reflect the user's current orders.
+        If search text is entered, only orders matching it are shown.
         """
+        self.order_search_job = None
         for item in self.order_history_tree.get_children():
             self.order_history_tree.delete(item)
+        self.order_history_rows = {}
+
+        self.refresh_open_order_statuses()
 
-        for order in self.controller.user.order_history:
+        query = self.order_search_var.get().strip()
+        if query:
+            orders = self.controller.data_store.search_orders(query)
+        else:
+            orders = self.controller.user.order_history
+
+        # One query per batch of orders rather than a lazy load per row
+        self.controller.data_store.load_items_for_orders(orders)
+        for order in orders:
             items_str = ', '.join([str(item) for item in order.items])
             total_price = order.get_total_order_price()
-            self.order_history_tree.insert('', 'end', values=(order.order_id, order.external_order_id, items_str, f"${total_price:.2f}", order.status.value))
+            row = self.order_history_tree.insert('', 'end', values=(order.order_id, order.external_order_id, items_str, f"${total_price:.2f}", order.status.value))
+            if order.external_order_id is not None:
+                self.order_history_rows[order.external_order_id] = row
+
+    def refresh_open_order_statuses(self):
+        """
+        Bring every open order in the user's history up to date with one batch query to the
+        order API and persist the changes in one transaction. Catches up on anything the
+        event bus could not deliver, e.g. orders whose events were published before the
+        view subscribed.
+        """
+        finished = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+        open_orders = {
+            order.external_order_id: order for order in self.controller.user.order_history
+            if order.external_order_id is not None and order.status not in finished
+        }
+        if not open_orders:
+            return
+        statuses = self.controller.api_client.get_order_statuses(list(open_orders))
+        changes = [
+            (open_orders[external_order_id], result[0])
+            for external_order_id, result in statuses.items()
+            if result[0] is not None
+        ]
+        self.controller.data_store.update_order_statuses(changes)
+
+    def load_older_orders(self):
+        """
+        Page the next batch of older orders in from the archive and show them in the Order History tab.
+        """
+        orders = self.controller.data_store.load_archived_orders()
+        if orders:
+            self.refresh_order_history_tab()
+            self.status_var.set(f"Loaded {len(orders)} older orders.")
+        else:
+            self.status_var.set("No older orders to load.")
+
+    def export_order_history(self):
+        """
+        Ask for a destination file and export the user's order history to CSV or JSONL.
+        The export runs on a background thread so the window stays responsive.
+        """
+        path = filedialog.asksaveasfilename(
+            title="Export Order History",
+            defaultextension='.csv',
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl")]
+        )
+        if not path:
+            return
+
+        self.status_var.set("Exporting order history...")
+
+        def run_export():
+            try:
+                count = self.controller.data_store.export_orders(path, user=self.controller.user.username)
+                self.root.after(0, lambda: self.status_var.set(f"Exported {count} records to {path}."))
+            except Exception as e:
+                self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Failed to export order history: {e}"))
+                self.root.after(0, lambda: self.status_var.set("Export failed."))
+
+        threading.Thread(target=run_export, daemon=True).start()
 
     def cancel_selected_order(self):
         """
@@ -666,12 +823,24 @@ You will receive updates on your order at this email address.
         progress.grid(row=4, column=0, pady=10, sticky='w')
         progress.start()
 
-        external_order_id = order.external_order_id
-        new_status, location, arrival_date, coordinates, expected_arrival = self.controller.api_client.get_order_status(external_order_id)
-        if new_status:
-            order.update_status(new_status)
-            self.controller.data_store.update_order_status(order)
-        status = order.status.value
+        # Later status and location changes update the label as they are published
+        self.tracked_order = order
+        self.show_tracking_info(order)
+
+        self.show_map(order.external_order_id)
+        progress.stop()
+        progress.grid_forget()
+
+    def show_tracking_info(self, order):
+        """
+        Fill the Track Order tab's label with the order's current tracking information.
+        The status is read from the order API; it is persisted by the controller's event subscriber.
+
+        Parameters:
+            order (Order): The order to show.
+        """
+        new_status, location, arrival_date, coordinates, expected_arrival = self.controller.api_client.get_order_status(order.external_order_id)
+        status = (new_status or order.status).value
         items_str = '\n'.join([str(item) for item in order.items])
         total_price = order.get_total_order_price()
         tracking_info = (
@@ -684,11 +853,6 @@ You will receive updates on your order at this email address.
         )
         self.track_order_result_label.config(text=tracking_info)
 
-        self.show_map(external_order_id)
-        self.refresh_order_history_tab()
-        progress.stop()
-        progress.grid_forget()
-
     def show_map(self, external_order_id):
         """
         Show a folium map for the given external order ID, including current location and route.
@@ -723,7 +887,7 @@ You will receive updates on your order at this email address.
                 tooltip='Destination',
                 icon=folium.Icon(color='green', icon='home', prefix='fa')
             ).add_to(map_obj)
-            folium.PolyLine(route_coords, color="blue", weight=2.5, opacity=1).add_to(map_obj)
+            folium.PolyLine(list(route_coords), color="blue", weight=2.5, opacity=1).add_to(map_obj)
 
         with tempfile.NamedTemporaryFile(delete=False, suffix='.html') as tmp_file:
             map_obj.save(tmp_file.name)
@@ -61,11 +61,13 @@ class PlaceOrderView:
 
         if items:
             order = Order(self.controller.user, items)
-            external_order_id = self.controller.api_client.place_order(order)
+            # Save the order before the API starts tracking it
+            external_order_id = self.controller.data_store.external_order_ids.next_id()
             order.external_order_id = external_order_id
             order.status = OrderStatus.PROCESSING
             self.controller.user.place_order(order)
             self.controller.data_store.add_order(order)
+            self.controller.api_client.place_order(order)
             messagebox.showinfo(
                 "Success",
                 f"Order placed successfully!\nInternal Order ID: {order.order_id}\nExternal Order ID: {external_order_id}"